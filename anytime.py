@@ -0,0 +1,208 @@
+"""
+Stratégies asynchrones, qui réfléchissent en continu.
+
+Une stratégie classique ne réfléchit qu'au moment où elle doit décider. Une
+`AsyncPlayer` peut continuer à réfléchir en tâche de fond pendant que son action
+s'exécute, et le moteur prend sa meilleure réponse quand la décision est due.
+
+Les coroutines tournent dans une boucle `asyncio` commune, dans un thread dédié :
+elles doivent rendre la main régulièrement (`await asyncio.sleep(0)`) pour pouvoir
+être interrompues.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import threading
+from concurrent.futures import Future
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from concurrent.futures import wait
+from contextvars import ContextVar
+from time import perf_counter
+from typing import Any, Awaitable, Callable, Optional
+
+from game import Action, Game, Player
+
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_loop_pid: Optional[int] = None
+_loop_lock = threading.Lock()
+
+
+def event_loop() -> asyncio.AbstractEventLoop:
+    """Renvoie la boucle des stratégies asynchrones, en la lançant au besoin."""
+    global _loop, _loop_pid
+    with _loop_lock:
+        # Après un fork, le thread de la boucle du processus parent n'existe plus
+        if _loop_pid != os.getpid():
+            _loop = asyncio.new_event_loop()
+            _loop_pid = os.getpid()
+            threading.Thread(
+                target=_loop.run_forever, name="anytime", daemon=True
+            ).start()
+        return _loop
+
+
+class Proposal:
+    """La meilleure action proposée pour une décision."""
+
+    __slots__ = ("action",)
+
+    def __init__(self):
+        """Aucune action n'est encore proposée."""
+        self.action: Optional[Action] = None
+
+
+# La proposition de la décision pour laquelle travaille la coroutine en cours :
+# une coroutine interrompue trop tard ne touche pas à la décision suivante
+_proposal: ContextVar[Optional[Proposal]] = ContextVar("proposal", default=None)
+
+
+async def _propose_into(
+    proposal: Proposal, function: Callable[[], Awaitable[Any]]
+) -> Any:
+    """Exécute la coroutine `function()`, dont les propositions vont dans `proposal`."""
+    _proposal.set(proposal)
+    return await function()
+
+
+class Thinking:
+    """Une coroutine lancée dans la boucle des stratégies, que l'on peut arrêter."""
+
+    def __init__(self, proposal: Proposal, function: Callable[[], Awaitable[Any]]):
+        """
+        Lance la coroutine `function()`, qui propose ses actions dans `proposal`.
+
+        La coroutine n'est créée qu'au démarrage de la tâche : une tâche annulée
+        avant de démarrer ne laisse pas de coroutine jamais attendue.
+        """
+        self.loop = event_loop()
+        self.future: Future = Future()
+        self.task: Optional[asyncio.Task] = None
+        # Les appels sont exécutés dans l'ordre : la tâche existe avant `cancel`
+        self.loop.call_soon_threadsafe(self._create, proposal, function)
+
+    def _create(self, proposal: Proposal, function: Callable[[], Awaitable[Any]]):
+        """Crée la tâche, depuis le thread de la boucle."""
+        self.task = self.loop.create_task(_propose_into(proposal, function))
+        self.task.add_done_callback(self._done)
+
+    def _done(self, task: asyncio.Task):
+        """Transmet la fin de la tâche au thread qui l'attend."""
+        if task.cancelled():
+            self.future.set_result(None)
+        elif task.exception() is not None:
+            self.future.set_exception(task.exception())
+        else:
+            self.future.set_result(task.result())
+
+    def stop(self, timeout: Optional[float] = None):
+        """Interrompt la coroutine, et attend au plus `timeout` qu'elle s'arrête."""
+        self.loop.call_soon_threadsafe(lambda: self.task.cancel())
+        wait([self.future], timeout)
+
+
+class AsyncPlayer(Player):
+    """
+    Une stratégie asynchrone.
+
+    À chaque décision, le moteur attend `play_async` pendant au plus `TIME_BUDGET`
+    secondes, moins `STOP_MARGIN`. Si la coroutine n'a pas terminé, la dernière
+    action proposée avec `propose` est jouée. Entre deux décisions, `ponder`
+    réfléchit en tâche de fond, et ses propositions servent à la décision suivante.
+    """
+
+    # Durée maximale de la réflexion de fond, en secondes : l'action la plus lente
+    # dure 2 s, et la réflexion ne doit pas survivre à la fin de la partie
+    PONDER_LIMIT = 2.0
+    # Temps réservé pour interrompre les coroutines, en secondes
+    STOP_MARGIN = 0.010
+
+    def __init__(self):
+        """Initialise la stratégie, sans réflexion en cours."""
+        super().__init__()
+        self._proposal = Proposal()
+        self._pondering: Optional[Thinking] = None
+
+    async def play_async(self, game: Game) -> Action:
+        """Choisit la prochaine action, en proposant des réponses au fur et à mesure."""
+        return self.proposal if self.proposal is not None else Action.WAIT
+
+    async def ponder(self, game: Game):
+        """Réfléchit pendant l'exécution de l'action choisie dans la partie `game`."""
+
+    @property
+    def proposal(self) -> Optional[Action]:
+        """La meilleure action proposée pour la décision en cours."""
+        return (_proposal.get() or self._proposal).action
+
+    def propose(self, action: Action):
+        """Retient la meilleure action trouvée jusqu'ici."""
+        (_proposal.get() or self._proposal).action = action
+
+    def play(self, game: Game) -> Action:
+        """
+        Interrompt la réflexion de fond, décide, puis relance la réflexion.
+
+        Le temps de réflexion est contrôlé par `Player._next_action`, comme pour les
+        autres stratégies : arrêter les coroutines en fait partie.
+        """
+        start = perf_counter()
+
+        def remaining() -> Optional[float]:
+            if self.TIME_BUDGET is None:
+                return None
+            budget = self.TIME_BUDGET - self.STOP_MARGIN
+            return max(budget - (perf_counter() - start), 0.0)
+
+        proposal = self._proposal
+        if self._pondering is not None:
+            self._pondering.stop(remaining())
+            self._pondering = None
+
+        thinking = Thinking(proposal, lambda: self.play_async(game))
+        try:
+            action = thinking.future.result(remaining())
+        except FutureTimeoutError:
+            action = proposal.action
+        finally:
+            if not thinking.future.done():
+                thinking.stop(self.STOP_MARGIN)
+            # Une nouvelle proposition pour la décision suivante
+            self._proposal = Proposal()
+
+        self._pondering = Thinking(
+            self._proposal,
+            lambda: asyncio.wait_for(self.ponder(game), self.PONDER_LIMIT),
+        )
+        return action if action is not None else Action.WAIT
+
+
+if __name__ == "__main__":
+    # Vérifie qu'une décision interrompue joue bien sa dernière proposition, même
+    # si la réflexion de fond propose autre chose pendant ce temps
+    from gamegrid import Tile
+
+    class Distracted(AsyncPlayer):
+        """Propose `MOVE_DOWN` puis ne termine jamais, et rêve d'attendre."""
+
+        async def play_async(self, game: Game) -> Action:
+            """Propose `MOVE_DOWN`, puis réfléchit sans fin."""
+            self.propose(Action.MOVE_DOWN)
+            while True:
+                await asyncio.sleep(0)
+
+        async def ponder(self, game: Game):
+            """Propose sans cesse `WAIT`."""
+            while True:
+                self.propose(Action.WAIT)
+                await asyncio.sleep(0)
+
+    player = Distracted()
+    g = Game([player, Player(), None, None], seed=0)
+    player.game = g
+    player.player_entity = g.player_entity_from_color(Tile.PLAYER_RED)
+    actions = [player.next_action() for _ in range(10)]
+    assert actions == [Action.MOVE_DOWN] * 10, actions
+    assert player.overruns == [], player.overruns
+    print("ok")
@@ -0,0 +1,326 @@
+"""
+Mesures de performance du moteur de Perfect Aim.
+
+Toutes les mesures sont faites sur un corpus de graines fixe, pour pouvoir comparer
+deux versions du moteur entre elles :
+
+    python benchmark.py --output baseline.json
+    python benchmark.py --compare baseline.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import platform
+import random
+import sys
+import tracemalloc
+from copy import deepcopy
+from datetime import datetime
+from fractions import Fraction
+from time import perf_counter
+from typing import Callable, Dict, List, Optional, Type
+
+import game
+import players
+from game import Action
+from gamegrid import Grid
+
+# Le corpus de graines sur lequel sont faites toutes les mesures
+SEEDS = tuple(range(1, 21))
+
+# Une mesure est considérée en régression si elle est 10 % moins bonne
+DEFAULT_THRESHOLD = 0.10
+
+
+class CountingGame(game.Game):
+    """Une partie qui compte le nombre d'étapes de simulation."""
+
+    def __init__(self, *args, **kwargs):
+        """Initialise une partie et son compteur d'étapes."""
+        self.ticks = 0
+        super().__init__(*args, **kwargs)
+
+    def _add_lava(self, dt: Fraction):
+        """Compte une étape, `_add_lava` étant appelée une fois par étape."""
+        self.ticks += 1
+        super()._add_lava(dt)
+
+
+def best_of(repeat: int, function: Callable[[], object]) -> float:
+    """Renvoie le meilleur temps d'exécution de `function` sur `repeat` essais."""
+    best = float("inf")
+    for _ in range(repeat):
+        t = perf_counter()
+        function()
+        best = min(best, perf_counter() - t)
+    return best
+
+
+def result(value: float, unit: str, better: str) -> Dict[str, object]:
+    """Met en forme le résultat d'une mesure."""
+    return {"value": value, "unit": unit, "better": better}
+
+
+def waiting_game(seed: int, t: Fraction = Fraction(0)) -> game.Game:
+    """Crée une partie de 4 joueurs qui attendent, avancée jusqu'à `t`."""
+    g = game.Game([game.Player() for _ in range(game.Game.MAX_PLAYERS)], seed)
+    g.update(float(t))
+    return g
+
+
+def bench_grid(repeat: int) -> Dict[str, Dict[str, object]]:
+    """Génération des cartes."""
+
+    def run():
+        for seed in SEEDS:
+            Grid(game.Game.DEFAULT_GRID_SIZE, seed)
+
+    return {"grid": result(best_of(repeat, run) / len(SEEDS), "s/grid", "lower")}
+
+
+def bench_grid_lookup(repeat: int) -> Dict[str, Dict[str, object]]:
+    """Lecture des entités de chaque case avec `entity_grid[y][x]`."""
+    games = [waiting_game(seed, Fraction(10)) for seed in SEEDS]
+    cells = [(x, y) for y in range(games[0].size) for x in range(games[0].size)]
+
+    def run():
+        for g in games:
+            grid = g.entity_grid
+            for x, y in cells:
+                grid[y][x]
+
+    lookups = len(games) * len(cells)
+    return {"grid_lookup": result(best_of(repeat, run) / lookups, "s/lookup", "lower")}
+
+
+def bench_deepcopy(repeat: int) -> Dict[str, Dict[str, object]]:
+    """Copie profonde des parties offertes aux joueurs."""
+    games = [waiting_game(seed, Fraction(10)) for seed in SEEDS]
+
+    def run():
+        for g in games:
+            for _ in range(10):
+                deepcopy(g)
+
+    # La mémoire occupée par un clone, en gardant tous les clones en vie
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    clones = [deepcopy(g) for g in games]
+    memory = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    del clones
+
+    return {
+        "deepcopy": result(best_of(repeat, run) / len(SEEDS) / 10, "s/clone", "lower"),
+        "deepcopy_memory": result(memory / len(games), "B/clone", "lower"),
+    }
+
+
+def bench_is_action_valid(repeat: int) -> Dict[str, Dict[str, object]]:
+    """Vérification de la validité des actions."""
+    games = [waiting_game(seed, Fraction(10)) for seed in SEEDS]
+    calls = [
+        (g, entity, action)
+        for g in games
+        for entity in g.player_entities
+        for action in Action
+    ]
+
+    def run():
+        for g, entity, action in calls:
+            g.is_action_valid(entity, action)
+
+    return {
+        "is_action_valid": result(best_of(repeat, run) / len(calls), "s/call", "lower")
+    }
+
+
+def bench_update(repeat: int) -> Dict[str, Dict[str, object]]:
+    """Débit du moteur avec des joueurs qui attendent."""
+    ticks = 0
+    duration = float("inf")
+    for _ in range(repeat):
+        t = perf_counter()
+        n = 0
+        for seed in SEEDS:
+            g = CountingGame([game.Player() for _ in range(4)], seed)
+            g.update(float(g.MAX_DURATION))
+            n += g.ticks
+        if perf_counter() - t < duration:
+            duration = perf_counter() - t
+            ticks = n
+    return {
+        "update_ticks": result(ticks / duration, "ticks/s", "higher"),
+        "update_games": result(len(SEEDS) / duration, "games/s", "higher"),
+    }
+
+
+def bench_encoder(repeat: int) -> Dict[str, Dict[str, object]]:
+    """Encodage des parties en plans de caractéristiques."""
+    from encoder import Encoder
+
+    encoder = Encoder()
+    states = [
+        (g, entity.color)
+        for g in (waiting_game(seed, Fraction(30)) for seed in SEEDS)
+        for entity in g.player_entities
+    ]
+
+    def run():
+        for _ in range(10):
+            for g, color in states:
+                encoder.encode(g, color)
+
+    return {
+        "encode": result(len(states) * 10 / best_of(repeat, run), "states/s", "higher")
+    }
+
+
+def bench_strategies(
+    repeat: int, constructors: List[Type[game.Player]]
+) -> Dict[str, Dict[str, object]]:
+    """Parties complètes avec chacune des stratégies fournies."""
+    results = {}
+    for constructor in constructors:
+
+        def run():
+            # Chaque essai doit calculer toutes les décisions
+            constructor.decision_cache().clear()
+            for seed in SEEDS:
+                # Les stratégies aléatoires doivent aussi être reproductibles
+                random.seed(seed)
+                g = game.Game([constructor() for _ in range(4)], seed)
+                g.update(float(g.MAX_DURATION))
+
+        results[f"strategy[{constructor.__module__}.{constructor.__name__}]"] = result(
+            best_of(repeat, run) / len(SEEDS), "s/game", "lower"
+        )
+    return results
+
+
+def bench_decisions(
+    repeat: int, constructors: List[Type[game.Player]]
+) -> Dict[str, Dict[str, object]]:
+    """Décisions isolées de chacune des stratégies fournies, sans cache."""
+    states = [
+        (g, g.player_entity_from_color(entity.color))
+        for g in (waiting_game(seed, Fraction(10)) for seed in SEEDS)
+        for entity in g.player_entities
+    ]
+    results = {}
+    for constructor in constructors:
+        player = constructor()
+
+        def run():
+            for g, entity in states:
+                player.game = g
+                player.player_entity = entity
+                player.play(g)
+
+        random.seed(0)
+        results[f"decision[{constructor.__module__}.{constructor.__name__}]"] = result(
+            best_of(repeat, run) / len(states), "s/decision", "lower"
+        )
+    return results
+
+
+def run_benchmarks(repeat: int, only: Optional[str] = None) -> Dict[str, object]:
+    """Lance toutes les mesures et renvoie les résultats."""
+    benchmarks: Dict[str, Callable[[], Dict[str, Dict[str, object]]]] = {
+        "grid": lambda: bench_grid(repeat),
+        "grid_lookup": lambda: bench_grid_lookup(repeat),
+        "deepcopy": lambda: bench_deepcopy(repeat),
+        "is_action_valid": lambda: bench_is_action_valid(repeat),
+        "update": lambda: bench_update(repeat),
+        "encode": lambda: bench_encoder(repeat),
+        "decisions": lambda: bench_decisions(
+            repeat, players.list_player_constructors()
+        ),
+        "strategies": lambda: bench_strategies(
+            repeat, players.list_player_constructors()
+        ),
+    }
+
+    results: Dict[str, Dict[str, object]] = {}
+    for name, benchmark in benchmarks.items():
+        if only is not None and not name.startswith(only):
+            continue
+        for key, value in benchmark().items():
+            results[key] = value
+            print(f"{key:40} {value['value']:12.6g} {value['unit']}")
+
+    return {
+        "date": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "seeds": list(SEEDS),
+        "repeat": repeat,
+        "results": results,
+    }
+
+
+def compare(
+    results: Dict[str, object], baseline: Dict[str, object], threshold: float
+) -> List[str]:
+    """Compare deux séries de mesures, et renvoie la liste des régressions."""
+    regressions = []
+    print(f"\n{'Mesure':40} {'Référence':>12} {'Actuel':>12} {'Écart':>8}")
+    for key, current in results["results"].items():
+        if key not in baseline["results"]:
+            continue
+        reference = baseline["results"][key]
+        if current["better"] == "lower":
+            change = current["value"] / reference["value"] - 1
+        else:
+            change = reference["value"] / current["value"] - 1
+        # `change` est positif quand la mesure s'est dégradée
+        flag = ""
+        if change > threshold:
+            regressions.append(key)
+            flag = " /!\\"
+        print(
+            f"{key:40} {reference['value']:12.6g} {current['value']:12.6g}"
+            f" {-change:+8.1%}{flag}"
+        )
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Point d'entrée en ligne de commande."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--output", "-o", help="fichier JSON des résultats")
+    parser.add_argument("--compare", "-c", help="fichier JSON de référence")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=DEFAULT_THRESHOLD,
+        help="dégradation tolérée avant de signaler une régression",
+    )
+    parser.add_argument("--repeat", type=int, default=3, help="nombre d'essais")
+    parser.add_argument("--only", help="ne lance que les mesures de ce préfixe")
+    args = parser.parse_args(argv)
+
+    results = run_benchmarks(args.repeat, args.only)
+
+    if args.output is not None:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+    if args.compare is not None:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} régression(s) : {', '.join(regressions)}")
+            return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    import os
+
+    os.chdir(os.path.dirname(os.path.abspath(__file__)))
+    sys.exit(main())
@@ -0,0 +1,147 @@
+"""
+Limite le temps de réflexion des stratégies.
+
+Un thread de surveillance lève une exception `DecisionTimeout` dans le thread d'une
+stratégie qui dépasse son temps de réflexion. L'exception est levée entre deux
+instructions Python : une stratégie bloquée dans un appel système (`time.sleep`,
+lecture de fichier...) n'est interrompue qu'au retour de cet appel, et une
+stratégie qui rattrape toutes les exceptions avec `except BaseException` ne peut
+pas être interrompue.
+"""
+
+from __future__ import annotations
+
+import ctypes
+import os
+import threading
+from contextlib import contextmanager
+from time import perf_counter
+from typing import Dict, Iterator, Optional, Set
+
+
+class DecisionTimeout(BaseException):
+    """
+    Exception levée dans une stratégie qui dépasse son temps de réflexion.
+
+    Elle hérite de `BaseException` pour ne pas être rattrapée par un
+    `except Exception` de la stratégie.
+    """
+
+
+def _raise_in_thread(thread_id: int, exception: Optional[type]):
+    """Lève `exception` dans le thread `thread_id`, ou annule l'exception en cours."""
+    ctypes.pythonapi.PyThreadState_SetAsyncExc(
+        ctypes.c_ulong(thread_id),
+        ctypes.py_object(exception) if exception is not None else None,
+    )
+
+
+class Watchdog:
+    """Un thread de surveillance qui interrompt les stratégies trop lentes."""
+
+    # Si la stratégie rattrape l'exception, on la relance après ce délai
+    RETRY_DELAY = 0.010
+
+    def __init__(self):
+        """Initialise le chien de garde, son thread est lancé au premier usage."""
+        self._pid: Optional[int] = None
+        self._start_lock = threading.Lock()
+        self._condition = threading.Condition()
+        self._deadlines: Dict[int, float] = {}
+        self._fired: Set[int] = set()
+
+    def _ensure_started(self):
+        """Lance le thread de surveillance, y compris dans un processus fils."""
+        if self._pid == os.getpid():
+            return
+        with self._start_lock:
+            if self._pid == os.getpid():
+                return
+            # Après un fork, le thread du processus parent n'existe plus
+            self._condition = threading.Condition()
+            self._deadlines = {}
+            self._fired = set()
+            threading.Thread(target=self._run, name="watchdog", daemon=True).start()
+            self._pid = os.getpid()
+
+    def _run(self):
+        """Boucle du thread de surveillance."""
+        condition = self._condition
+        with condition:
+            while True:
+                now = perf_counter()
+                for thread_id, deadline in self._deadlines.items():
+                    if deadline <= now:
+                        _raise_in_thread(thread_id, DecisionTimeout)
+                        self._fired.add(thread_id)
+                        self._deadlines[thread_id] = now + self.RETRY_DELAY
+                timeout = None
+                if self._deadlines:
+                    timeout = min(self._deadlines.values()) - now
+                condition.wait(timeout)
+
+    @contextmanager
+    def time_limit(self, budget: Optional[float]) -> Iterator[None]:
+        """Lève `DecisionTimeout` si le bloc dure plus de `budget` secondes."""
+        if budget is None:
+            yield
+            return
+
+        thread_id = threading.get_ident()
+        self._ensure_started()
+        with self._condition:
+            self._deadlines[thread_id] = perf_counter() + budget
+            self._condition.notify()
+        try:
+            yield
+        finally:
+            # Le chien de garde peut lever l'exception juste après la fin du bloc,
+            # même à l'entrée de `_disarm` : elle est ignorée, et on recommence
+            while True:
+                try:
+                    self._disarm(thread_id)
+                    break
+                except DecisionTimeout:
+                    pass
+
+    def _disarm(self, thread_id: int):
+        """Retire l'échéance du thread courant `thread_id`, et l'exception prévue."""
+        with self._condition:
+            # Le chien de garde ne lève rien sans le verrou : une fois l'échéance
+            # retirée, il ne peut plus programmer d'exception
+            self._deadlines.pop(thread_id, None)
+            fired = thread_id in self._fired
+            self._fired.discard(thread_id)
+        if fired:
+            # L'exception a pu être programmée sans avoir été levée
+            _raise_in_thread(thread_id, None)
+
+
+watchdog = Watchdog()
+time_limit = watchdog.time_limit
+
+
+if __name__ == "__main__":
+    # Vérifie qu'un bloc qui se termine pile à l'échéance ne laisse ni échéance
+    # enregistrée, ni exception levée plus tard
+    import sys
+    from time import sleep
+
+    # Le chien de garde doit pouvoir prendre la main pile à l'échéance
+    sys.setswitchinterval(0.0001)
+    budget = 0.002
+    timeouts = 0
+    for i in range(500):
+        try:
+            with time_limit(budget):
+                # De bien avant à bien après l'échéance
+                end = perf_counter() + budget * (0.5 + (i % 20) / 20)
+                while perf_counter() < end:
+                    pass
+        except DecisionTimeout:
+            timeouts += 1
+        assert watchdog._deadlines == {}, watchdog._deadlines
+    # Une exception encore programmée serait levée pendant cette attente
+    for _ in range(10):
+        sleep(Watchdog.RETRY_DELAY)
+    print(f"ok ({timeouts} interruptions sur 500)")
@@ -0,0 +1,340 @@
+"""
+Tournoi toutes rondes réparti entre plusieurs machines.
+
+Un coordinateur prépare les lots de parties de `roundrobin`, les distribue aux
+travailleurs qui se connectent, et enregistre les résultats et les replays dans
+sa base. Les échanges passent par un `multiprocessing.managers.BaseManager` :
+une simple socket TCP protégée par une clé, sans autre dépendance.
+
+Les messages sont des objets `pickle` : quiconque connaît la clé peut exécuter du
+code sur le coordinateur et les travailleurs. Il n'y a donc pas de clé par défaut,
+elle est lue dans `--authkey` ou dans la variable d'environnement
+`PERFECT_AIM_AUTHKEY`, qui a l'avantage de ne pas apparaître dans la liste des
+processus :
+
+    export PERFECT_AIM_AUTHKEY=$(python -c "import secrets; print(secrets.token_hex())")
+    python distributed.py --address 127.0.0.1:50000 serve --games 10
+    python distributed.py --address 127.0.0.1:50000 work --processes 4
+
+Les travailleurs peuvent arriver et partir à tout moment. Un lot est prêté à un
+travailleur pour `Coordinator.LEASE_DURATION` secondes : s'il n'a pas rendu de
+résultat avant, le lot est prêté à un autre. Chaque travailleur vérifie que son
+code est celui du coordinateur (voir `store.lineup_key`) avant de jouer.
+"""
+
+from __future__ import annotations
+
+import argparse
+import importlib
+import os
+import queue
+import socket
+import sys
+import threading
+import time
+from collections import deque
+from multiprocessing import Process, cpu_count
+from multiprocessing.managers import BaseManager
+from typing import Deque, Dict, List, Optional, Sequence, Set, Tuple, Type
+
+import players
+from game import Player
+from roundrobin import (
+    DEFAULT_SIZES,
+    Lineup,
+    plan_round_robin,
+    print_cross_table,
+    print_paired_statistics,
+)
+from store import ResultStore, lineup_key
+from tournament import Job, Outcome, Result, play_games
+
+DEFAULT_ADDRESS = "127.0.0.1:50000"
+# Variable d'environnement de la clé partagée, à défaut de `--authkey`
+AUTHKEY_VARIABLE = "PERFECT_AIM_AUTHKEY"
+
+# Un lot prêté à un travailleur : identifiant du prêt, empreinte de la
+# composition, noms des classes des joueurs et parties à jouer
+Lease = Tuple[int, str, List[Optional[str]], List[Job]]
+
+
+class Coordinator:
+    """
+    La file des lots d'un tournoi, partagée entre les travailleurs.
+
+    Les méthodes sont appelées depuis les fils d'exécution du serveur, une par
+    connexion : elles sont toutes protégées par un verrou.
+    """
+
+    # Durée d'un prêt, en secondes, avant qu'un lot soit confié à quelqu'un d'autre
+    LEASE_DURATION = 300.0
+
+    def __init__(self, tasks: List[Tuple[str, List[Optional[str]], List[Job]]]):
+        """Crée la file des lots `tasks`, décrits par empreinte, noms et parties."""
+        self.tasks = tasks
+        self.lock = threading.Lock()
+        self.pending: Deque[int] = deque(range(len(tasks)))
+        # Prêts en cours : lot et date limite
+        self.leases: Dict[int, Tuple[int, float]] = {}
+        # Lot de chaque prêt, même expiré, pour accepter un résultat en retard
+        self.leased_tasks: Dict[int, int] = {}
+        self.done: Set[int] = set()
+        # Lots terminés, lus par le fil principal qui les enregistre
+        self.outcomes: queue.Queue = queue.Queue()
+        self.workers: Set[str] = set()
+
+    def _reclaim(self):
+        """Remet en tête de file les lots dont le prêt a expiré."""
+        now = time.monotonic()
+        for lease_id, (task, deadline) in list(self.leases.items()):
+            if deadline < now:
+                del self.leases[lease_id]
+                if task not in self.done:
+                    self.pending.appendleft(task)
+
+    def lease(self, worker: str) -> Optional[Lease]:
+        """Prête le prochain lot au travailleur `worker`, s'il en reste un."""
+        with self.lock:
+            if worker not in self.workers:
+                self.workers.add(worker)
+                print(f"\nNouveau travailleur : {worker}", file=sys.stderr)
+            self._reclaim()
+            while len(self.pending) > 0:
+                task = self.pending.popleft()
+                if task in self.done:
+                    continue
+                lease_id = len(self.leased_tasks)
+                self.leases[lease_id] = (task, time.monotonic() + self.LEASE_DURATION)
+                self.leased_tasks[lease_id] = task
+                return (lease_id, *self.tasks[task])
+            return None
+
+    def complete(self, lease_id: int, outcomes: List[Outcome]):
+        """Reçoit les résultats du prêt `lease_id`."""
+        with self.lock:
+            self.leases.pop(lease_id, None)
+            task = self.leased_tasks[lease_id]
+            # Un lot prêté deux fois n'est compté qu'une fois
+            if task in self.done:
+                return
+            self.done.add(task)
+            self.outcomes.put((task, outcomes))
+
+    def release(self, lease_id: int):
+        """Rend le lot du prêt `lease_id` sans l'avoir joué."""
+        with self.lock:
+            if self.leases.pop(lease_id, None) is not None:
+                task = self.leased_tasks[lease_id]
+                if task not in self.done:
+                    self.pending.appendleft(task)
+
+    def finished(self) -> bool:
+        """Renvoie vrai si tous les lots sont joués."""
+        with self.lock:
+            return len(self.done) == len(self.tasks)
+
+    def running(self) -> int:
+        """Nombre de prêts en cours."""
+        with self.lock:
+            return len(self.leases)
+
+
+class CoordinatorManager(BaseManager):
+    """Le serveur qui expose le coordinateur aux travailleurs."""
+
+
+def parse_address(address: str) -> Tuple[str, int]:
+    """Découpe une adresse `hôte:port`."""
+    host, _, port = address.rpartition(":")
+    return host, int(port)
+
+
+def class_paths(lineup: List[Optional[Type[Player]]]) -> List[Optional[str]]:
+    """Les chemins des classes d'une composition, pour les retrouver à distance."""
+    return [
+        None if cls is None else f"{cls.__module__}.{cls.__qualname__}"
+        for cls in lineup
+    ]
+
+
+def resolve(name: Optional[str]) -> Optional[Type[Player]]:
+    """Retrouve la classe de chemin `name`."""
+    if name is None:
+        return None
+    module, _, qualname = name.rpartition(".")
+    return getattr(importlib.import_module(module), qualname)
+
+
+def serve(
+    constructors: List[Type[Player]],
+    games: int,
+    store: ResultStore,
+    address: Tuple[str, int],
+    authkey: bytes,
+    sizes: Sequence[int] = DEFAULT_SIZES,
+    batches: int = 4,
+    paired: bool = False,
+    lease_duration: float = Coordinator.LEASE_DURATION,
+) -> Dict[Lineup, Dict[Job, Result]]:
+    """
+    Distribue un tournoi toutes rondes aux travailleurs, et attend ses résultats.
+
+    Les résultats sont enregistrés dans `store` par le fil principal, au fur et à
+    mesure : un tournoi interrompu reprend là où il s'était arrêté.
+    """
+    results, tasks = plan_round_robin(
+        constructors, games, store, sizes, batches, paired
+    )
+    coordinator = Coordinator(
+        [(lineup_key(lineup), class_paths(lineup), jobs) for jobs, lineup in tasks]
+    )
+    coordinator.LEASE_DURATION = lease_duration
+
+    CoordinatorManager.register("coordinator", callable=lambda: coordinator)
+    manager = CoordinatorManager(address=address, authkey=authkey)
+    server = manager.get_server()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    print(f"En attente de travailleurs sur {address[0]}:{address[1]}", file=sys.stderr)
+
+    for played in range(len(tasks)):
+        task, outcomes = coordinator.outcomes.get()
+        lineup = tasks[task][1]
+        for (seed, permutation), result, duration in outcomes:
+            store.add(lineup, seed, permutation, result, duration)
+            results[tuple(lineup)][seed, permutation] = result
+        print(
+            f"\r{played + 1}/{len(tasks)} lots joués,"
+            f" {coordinator.running()} en cours",
+            end="",
+            file=sys.stderr,
+        )
+    if len(tasks) > 0:
+        print(file=sys.stderr)
+    return results
+
+
+def work(address: Tuple[str, int], authkey: bytes, poll_interval: float = 1.0):
+    """
+    Joue les lots du coordinateur `address` jusqu'à la fin du tournoi.
+
+    S'arrête quand le coordinateur a disparu, ou si le code local diffère du sien.
+    """
+    worker = f"{socket.gethostname()}:{os.getpid()}"
+    CoordinatorManager.register("coordinator")
+    manager = CoordinatorManager(address=address, authkey=authkey)
+    try:
+        manager.connect()
+        coordinator = manager.coordinator()
+        while not coordinator.finished():
+            lease = coordinator.lease(worker)
+            if lease is None:
+                # Les derniers lots sont prêtés : l'un d'eux peut encore revenir
+                time.sleep(poll_interval)
+                continue
+            lease_id, key, names, jobs = lease
+            lineup = [resolve(name) for name in names]
+            if lineup_key(lineup) != key:
+                coordinator.release(lease_id)
+                print(f"{worker} : code différent du coordinateur", file=sys.stderr)
+                return
+            coordinator.complete(lease_id, play_games((jobs, lineup)))
+    except (ConnectionError, EOFError):
+        # Le coordinateur a fini, ou s'est arrêté
+        pass
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Point d'entrée en ligne de commande."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "--address", default=DEFAULT_ADDRESS, help="adresse du coordinateur"
+    )
+    parser.add_argument(
+        "--authkey",
+        default=os.environ.get(AUTHKEY_VARIABLE),
+        help=f"clé secrète partagée avec les travailleurs (ou ${AUTHKEY_VARIABLE})",
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    serve_parser = commands.add_parser("serve", help="distribuer un tournoi")
+    serve_parser.add_argument(
+        "--games",
+        "-n",
+        type=int,
+        default=10,
+        help="parties par composition, ou cartes avec --paired",
+    )
+    serve_parser.add_argument(
+        "--sizes",
+        type=int,
+        nargs="+",
+        default=list(DEFAULT_SIZES),
+        help="nombres de joueurs des compositions",
+    )
+    serve_parser.add_argument(
+        "--players", nargs="+", help="noms des stratégies à inclure (toutes sinon)"
+    )
+    serve_parser.add_argument(
+        "--batches",
+        type=int,
+        default=4,
+        help="nombre de lots des compositions avec une stratégie BATCHED",
+    )
+    serve_parser.add_argument(
+        "--paired",
+        action="store_true",
+        help="jouer chaque carte depuis tous ses départs et comparer carte par carte",
+    )
+    serve_parser.add_argument(
+        "--lease",
+        type=float,
+        default=Coordinator.LEASE_DURATION,
+        help="secondes avant de confier à un autre le lot d'un travailleur muet",
+    )
+
+    work_parser = commands.add_parser("work", help="jouer les parties d'un tournoi")
+    work_parser.add_argument(
+        "--processes", type=int, default=cpu_count(), help="nombre de processus"
+    )
+    args = parser.parse_args(argv)
+
+    if not args.authkey:
+        parser.error(f"une clé secrète est requise : --authkey ou ${AUTHKEY_VARIABLE}")
+    address = parse_address(args.address)
+    authkey = args.authkey.encode()
+
+    if args.command == "work":
+        workers = [
+            Process(target=work, args=(address, authkey)) for _ in range(args.processes)
+        ]
+        for process in workers:
+            process.start()
+        for process in workers:
+            process.join()
+        return 0
+
+    constructors = players.list_player_constructors()
+    if args.players is not None:
+        constructors = [cls for cls in constructors if cls.NAME in args.players]
+    with ResultStore() as store:
+        results = serve(
+            constructors,
+            args.games,
+            store,
+            address,
+            authkey,
+            args.sizes,
+            args.batches,
+            args.paired,
+            args.lease,
+        )
+    print_cross_table(constructors, results)
+    if args.paired:
+        print()
+        print_paired_statistics(results)
+    return 0
+
+
+if __name__ == "__main__":
+    os.chdir(os.path.dirname(os.path.abspath(__file__)))
+    sys.exit(main())
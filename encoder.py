@@ -0,0 +1,150 @@
+"""
+Encodage de l'état d'une partie en plans de caractéristiques.
+
+Les stratégies apprises travaillent sur des tenseurs plutôt que sur des listes de
+`Tile` et des ensembles d'entités : `Encoder` écrit une partie dans un tableau
+NumPy de forme `(plans, taille, taille)`, alloué une seule fois et réutilisé à
+chaque appel :
+
+    encoder = Encoder()
+    planes = encoder.encode(game, color)
+"""
+
+from __future__ import annotations
+
+from typing import Dict, List, Optional
+
+import numpy as np
+
+import entities
+from game import Action, Game
+from gamegrid import Tile
+
+
+class Encoder:
+    """Encode des parties dans un tampon préalloué, un plan par caractéristique."""
+
+    BACKGROUND = [Tile.FLOOR, Tile.WALL, Tile.LAVA, Tile.DAMAGED_FLOOR]
+    COLLECTIBLES = [
+        Tile.SPEEDBOOST,
+        Tile.SPEEDPENALTY,
+        Tile.COIN,
+        Tile.SUPER_FIREBALL,
+        Tile.SHIELD,
+    ]
+    # Pour chaque joueur : sa position, puis ses caractéristiques sur tout le plan
+    PLAYER_FEATURES = [
+        "position",
+        "speed",
+        "action_progress",
+        "shield",
+        "coins",
+        "super_fireballs",
+    ]
+    FIREBALL_DIRECTIONS = [
+        Action.MOVE_UP,
+        Action.MOVE_DOWN,
+        Action.MOVE_LEFT,
+        Action.MOVE_RIGHT,
+    ]
+
+    def __init__(self, size: int = Game.DEFAULT_GRID_SIZE):
+        """Alloue le tampon pour des cartes de taille `size`."""
+        self.size = size
+
+        # Les noms des plans, dans l'ordre du tampon
+        self.planes: List[str] = [f"background.{tile.name}" for tile in self.BACKGROUND]
+        self.planes += [f"collectible.{tile.name}" for tile in self.COLLECTIBLES]
+        self.planes += [
+            f"player{i}.{feature}"
+            for i in range(Game.MAX_PLAYERS)
+            for feature in self.PLAYER_FEATURES
+        ]
+        self.planes += [
+            f"fireball.{action.name}" for action in self.FIREBALL_DIRECTIONS
+        ]
+        self.planes += ["lava", "time"]
+
+        self._collectibles: Dict[Tile, int] = {
+            tile: self.planes.index(f"collectible.{tile.name}")
+            for tile in self.COLLECTIBLES
+        }
+        self._fireballs: Dict[Action, int] = {
+            action: self.planes.index(f"fireball.{action.name}")
+            for action in self.FIREBALL_DIRECTIONS
+        }
+        self._players = self.planes.index("player0.position")
+        self._lava = self.planes.index("lava")
+        self._time = self.planes.index("time")
+
+        self.buffer = np.zeros((len(self.planes), size, size), np.float32)
+        # Le terrain est copié octet par octet, bien plus vite que case par case
+        self._background = bytearray(size * size)
+        self._tiles = np.frombuffer(self._background, np.uint8).reshape(size, size)
+        self._lava_time = self._lava_schedule()
+
+    def encode(
+        self, game: Game, color: Optional[Tile] = None, out: Optional[np.ndarray] = None
+    ) -> np.ndarray:
+        """
+        Écrit la partie `game` dans `out`, ou dans le tampon de l'encodeur.
+
+        Si `color` est donnée, ce joueur occupe les premiers plans de joueur, et
+        les autres suivent dans l'ordre des couleurs : la stratégie se voit
+        toujours à la même place. Le tableau renvoyé est réutilisé à l'appel
+        suivant, il faut le copier pour le conserver.
+        """
+        if out is None:
+            out = self.buffer
+        out.fill(0)
+
+        # Le terrain, un plan par type de case
+        self._background[:] = game.terrain
+        for i, tile in enumerate(self.BACKGROUND):
+            np.equal(self._tiles, tile, out=out[i], casting="unsafe")
+
+        # Les joueurs, en commençant par `color`
+        colors = [player.TILE for player in entities.players]
+        if color is not None:
+            i = colors.index(color)
+            colors = colors[i:] + colors[:i]
+        features = len(self.PLAYER_FEATURES)
+        offsets = {c: self._players + i * features for i, c in enumerate(colors)}
+
+        for entity in game.entities:
+            if isinstance(entity, entities.PlayerEntity):
+                offset = offsets[entity.color]
+                out[offset, entity.y, entity.x] = 1
+                out[offset + 1].fill(entity.speed)
+                out[offset + 2].fill(entity.action_progress)
+                out[offset + 3].fill(entity.shield)
+                out[offset + 4].fill(entity.coins)
+                out[offset + 5].fill(entity.super_fireballs)
+            elif isinstance(entity, entities.Fireball):
+                out[self._fireballs[entity.action], entity.y, entity.x] = 1
+            else:
+                out[self._collectibles[entity.TILE], entity.y, entity.x] = 1
+
+        # Le temps restant avant que chaque case ne devienne de la lave
+        lava = out[self._lava]
+        np.subtract(self._lava_time, float(game.t), out=lava)
+        np.multiply(lava, 1 / float(Game.MAX_DURATION), out=lava)
+        np.clip(lava, 0, 1, out=lava)
+        out[self._time].fill(game.t / Game.MAX_DURATION)
+
+        return out
+
+    def _lava_schedule(self) -> np.ndarray:
+        """L'instant où chaque case devient de la lave, infini si jamais."""
+        xs, ys = np.meshgrid(np.arange(self.size), np.arange(self.size))
+        ring = np.minimum(
+            np.minimum(xs, ys), np.minimum(self.size - 1 - xs, self.size - 1 - ys)
+        )
+        # L'anneau `ring` s'endommage à l'étape `2 (ring - 1)`, puis devient de la
+        # lave à l'étape suivante, comme dans `Game._add_lava`
+        step = 2 * (ring - 1) + 1
+        schedule = float(Game.LAVA_FLOOD_START_TIME) + step * float(
+            Game.LAVA_STEP_DURATION
+        )
+        flooded = (ring >= 1) & (ring < self.size // 2)
+        return np.where(flooded, schedule, np.inf).astype(np.float32)
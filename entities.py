@@ -27,83 +27,73 @@ class Action(Enum):
     def apply(self, coords: Tuple[int, int]) -> Tuple[int, int]:
         """Applique le déplacement à la paire de coordonnées."""
         x, y = coords
-        if self == Action.MOVE_UP:
-            return x, y - 1
-        if self == Action.MOVE_DOWN:
-            return x, y + 1
-        if self == Action.MOVE_LEFT:
-            return x - 1, y
-        if self == Action.MOVE_RIGHT:
-            return x + 1, y
-        return x, y
+        dx, dy = self._delta
+        return x + dx, y + dy
 
     def swap(self) -> Action:
         """Donne la direction opposée de l'action."""
-        if self == Action.MOVE_UP:
-            return Action.MOVE_DOWN
-        if self == Action.MOVE_DOWN:
-            return Action.MOVE_UP
-        if self == Action.MOVE_LEFT:
-            return Action.MOVE_RIGHT
-        if self == Action.MOVE_RIGHT:
-            return Action.MOVE_LEFT
-        if self == Action.ATTACK_UP:
-            return Action.ATTACK_DOWN
-        if self == Action.ATTACK_DOWN:
-            return Action.ATTACK_UP
-        if self == Action.ATTACK_LEFT:
-            return Action.ATTACK_RIGHT
-        if self == Action.ATTACK_RIGHT:
-            return Action.ATTACK_LEFT
-        return Action.WAIT
+        return self._swap
 
     def to_attack(self) -> Action:
         """Attaque dans la direction."""
-        if self == Action.MOVE_UP:
-            return Action.ATTACK_UP
-        if self == Action.MOVE_DOWN:
-            return Action.ATTACK_DOWN
-        if self == Action.MOVE_LEFT:
-            return Action.ATTACK_LEFT
-        if self == Action.MOVE_RIGHT:
-            return Action.ATTACK_RIGHT
-        return self
+        return self._attack
 
     def to_movement(self) -> Action:
         """Déplacement dans la direction."""
-        if self == Action.ATTACK_UP:
-            return Action.MOVE_UP
-        if self == Action.ATTACK_DOWN:
-            return Action.MOVE_DOWN
-        if self == Action.ATTACK_LEFT:
-            return Action.MOVE_LEFT
-        if self == Action.ATTACK_RIGHT:
-            return Action.MOVE_RIGHT
-        return self
+        return self._movement
 
     def is_attack(self) -> bool:
         """Renvoie vrai si l'action est une attaque."""
-        return self in (
-            Action.ATTACK_UP,
-            Action.ATTACK_DOWN,
-            Action.ATTACK_LEFT,
-            Action.ATTACK_RIGHT,
-        )
+        return self._is_attack
 
     def is_movement(self) -> bool:
         """Renvoie vrai si l'action est un déplacement."""
-        return self in (
-            Action.MOVE_UP,
-            Action.MOVE_DOWN,
-            Action.MOVE_LEFT,
-            Action.MOVE_RIGHT,
-        )
+        return self._is_movement
+
+
+# Les méthodes de `Action` lisent des tables précalculées, rangées dans chaque action
+_MOVEMENTS = {
+    Action.MOVE_UP: (Action.ATTACK_UP, Action.MOVE_DOWN, (0, -1)),
+    Action.MOVE_DOWN: (Action.ATTACK_DOWN, Action.MOVE_UP, (0, 1)),
+    Action.MOVE_LEFT: (Action.ATTACK_LEFT, Action.MOVE_RIGHT, (-1, 0)),
+    Action.MOVE_RIGHT: (Action.ATTACK_RIGHT, Action.MOVE_LEFT, (1, 0)),
+}
+for _action in Action:
+    _action._delta = (0, 0)
+    _action._swap = Action.WAIT
+    _action._attack = _action
+    _action._movement = _action
+    _action._is_attack = False
+    _action._is_movement = False
+for _movement, (_attack, _opposite, _delta) in _MOVEMENTS.items():
+    _movement._delta = _delta
+    _movement._swap = _opposite
+    _movement._attack = _attack
+    _movement._is_movement = True
+    _attack._swap = _MOVEMENTS[_opposite][0]
+    _attack._movement = _movement
+    _attack._is_attack = True
 
 
 class Entity:
     """Une entité de la zone de jeu."""
 
+    # Des attributs fixes plutôt qu'un dictionnaire : moins de mémoire par entité,
+    # et des copies plus rapides
+    __slots__ = ("x", "y")
+
     TILE = Tile.INVALID
+    # Tous les attributs de l'entité, y compris ceux des classes parentes
+    ATTRIBUTES: Tuple[str, ...] = __slots__
+
+    def __init_subclass__(cls, **kwargs):
+        """Recense les attributs de la sous-classe."""
+        super().__init_subclass__(**kwargs)
+        cls.ATTRIBUTES = tuple(
+            name
+            for parent in reversed(cls.__mro__)
+            for name in parent.__dict__.get("__slots__", ())
+        )
 
     def __init__(self, x: int, y: int):
         """Entité placée initialement en `(x, y)`."""
@@ -124,6 +114,8 @@ class Entity:
 class MovingEntity(Entity):
     """Une entité mobile de la zone de jeu."""
 
+    __slots__ = ("speed", "action", "action_progress")
+
     def __init__(self, x: int, y: int, speed: Fraction):
         """L'entité réalise `speed` actions par seconde."""
         super().__init__(x, y)
@@ -131,6 +123,13 @@ class MovingEntity(Entity):
         self.action = Action.WAIT
         self.action_progress = Fraction(0)
 
+    def __copy__(self):
+        """Copie l'entité attribut par attribut."""
+        clone = object.__new__(self.__class__)
+        for name in self.ATTRIBUTES:
+            setattr(clone, name, getattr(self, name))
+        return clone
+
     @property
     def time_before_next_update(self) -> Fraction:
         """Temps en seconde avant la prochaine update pour cette entité."""
@@ -198,6 +197,8 @@ class PlayerEntity(MovingEntity):
     d'action.
     """
 
+    __slots__ = ("shield", "coins", "super_fireballs")
+
     INITIAL_SPEED = Fraction(1)
 
     def __init__(self, x: int, y: int):
@@ -212,13 +213,17 @@ class PlayerEntity(MovingEntity):
         """La couleur du joueur."""
         return self.TILE
 
+    def is_action_over(self, dt: Fraction) -> bool:
+        """Renvoie vrai si l'action en cours se termine dans `dt` secondes."""
+        return self.action_progress < 1 <= self.action_progress + dt * self.speed
+
     def update(self, game: Game, dt: Fraction):
         """Met à jour la position du joueur et choisit sa prochaine action."""
         # Fin d'une action, choix de la prochaine action
-        if self.action_progress < 1 <= self.action_progress + dt * self.speed:
+        if self.is_action_over(dt):
 
             # Choix de la prochaine action
-            self.action = game.next_action(self)
+            game.set_action(self, game.next_action(self))
             self.action_progress = Fraction(0)
 
             if self.action.is_attack():
@@ -243,7 +248,7 @@ class PlayerEntity(MovingEntity):
                     game.remove_entity(self)
                     return
 
-                for entity in game.entity_grid[self.y][self.x].copy():
+                for entity in game.entities_at(self.x, self.y):
                     # Suppression du joueur s'il est transpercé par une boule de feu
                     if isinstance(entity, Fireball):
                         game.hit_player(entity, self)
@@ -254,7 +259,7 @@ class PlayerEntity(MovingEntity):
 
             # Sinon, on fait demi-tour
             else:
-                self.action = self.action.swap()
+                game.set_action(self, self.action.swap())
 
         # Rien de spécial, on avance dans l'action
         else:
@@ -264,24 +269,32 @@ class PlayerEntity(MovingEntity):
 class RedPlayer(PlayerEntity):
     """Le joueur rouge."""
 
+    __slots__ = ()
+
     TILE = Tile.PLAYER_RED
 
 
 class BluePlayer(PlayerEntity):
     """Le joueur bleu."""
 
+    __slots__ = ()
+
     TILE = Tile.PLAYER_BLUE
 
 
 class YellowPlayer(PlayerEntity):
     """Le joueur jaune."""
 
+    __slots__ = ()
+
     TILE = Tile.PLAYER_YELLOW
 
 
 class GreenPlayer(PlayerEntity):
     """Le joueur vert."""
 
+    __slots__ = ()
+
     TILE = Tile.PLAYER_GREEN
 
 
@@ -296,6 +309,8 @@ players: List[Type[PlayerEntity]] = [
 class Fireball(MovingEntity):
     """Une boule de feu, qui tue les joueurs qu'elle traverse."""
 
+    __slots__ = ("sender",)
+
     TILE = Tile.FIREBALL
     INITIAL_SPEED = Fraction(4)
 
@@ -316,13 +331,41 @@ class Fireball(MovingEntity):
                 game.remove_entity(self)
 
             # Suppression des joueurs transpercés par la boule de feu
-            for entity in game.entity_grid[self.y][self.x].copy():
+            for entity in game.entities_at(self.x, self.y):
                 if isinstance(entity, PlayerEntity):
                     game.hit_player(self, entity)
 
 
 class CollectableEntity(Entity):
-    """Une entité ramassable de la zone de jeu."""
+    """
+    Une entité ramassable de la zone de jeu.
+
+    Un objet ne change jamais une fois posé : il est immuable, et une copie de la
+    partie référence le même objet au lieu de le dupliquer.
+    """
+
+    __slots__ = ()
+
+    def __init__(self, x: int, y: int):
+        """Objet posé en `(x, y)`."""
+        object.__setattr__(self, "x", x)
+        object.__setattr__(self, "y", y)
+
+    def __setattr__(self, name: str, value: object):
+        """Interdit toute modification."""
+        raise AttributeError(f"{self.__class__.__name__} est immuable")
+
+    def __copy__(self):
+        """Un objet immuable est sa propre copie."""
+        return self
+
+    def __deepcopy__(self, memo):
+        """Un objet immuable est sa propre copie."""
+        return self
+
+    def __reduce__(self):
+        """Recrée l'objet à partir de sa position."""
+        return self.__class__, (self.x, self.y)
 
     def collect(self, player: PlayerEntity):
         """Le joueur `player` ramasse l'entité."""
@@ -331,6 +374,8 @@ class CollectableEntity(Entity):
 class Coin(CollectableEntity):
     """Une pièce à ramasser."""
 
+    __slots__ = ()
+
     TILE = Tile.COIN
 
     def collect(self, player: PlayerEntity):
@@ -341,6 +386,8 @@ class Coin(CollectableEntity):
 class SpeedBoost(CollectableEntity):
     """Un bonus de vitesse."""
 
+    __slots__ = ()
+
     TILE = Tile.SPEEDBOOST
 
     def collect(self, player: PlayerEntity):
@@ -351,6 +398,8 @@ class SpeedBoost(CollectableEntity):
 class SpeedPenalty(CollectableEntity):
     """Un malus de vitesse."""
 
+    __slots__ = ()
+
     TILE = Tile.SPEEDPENALTY
 
     def collect(self, player: PlayerEntity):
@@ -362,6 +411,8 @@ class SpeedPenalty(CollectableEntity):
 class SuperFireball(CollectableEntity):
     """Un sort qui lance une boule de feu dans toutes les directions."""
 
+    __slots__ = ()
+
     TILE = Tile.SUPER_FIREBALL
 
     def collect(self, player: PlayerEntity):
@@ -372,6 +423,8 @@ class SuperFireball(CollectableEntity):
 class Shield(CollectableEntity):
     """Un bouclier qui protège d'une boule de feu."""
 
+    __slots__ = ()
+
     TILE = Tile.SHIELD
 
     def collect(self, player: PlayerEntity):
@@ -2,44 +2,159 @@
 
 from __future__ import annotations
 
+import threading
+from concurrent.futures import Executor
 from copy import copy, deepcopy
 from fractions import Fraction
+from math import ceil
 from time import perf_counter
 from typing import Dict, List, Optional, Set, Tuple
 
 import entities
+import zobrist
+from deadline import DecisionTimeout, time_limit
 from gamegrid import Grid, Tile
 
 Action = entities.Action
 
 
+# Protège la création des caches de décisions, demandés depuis plusieurs threads
+_decision_cache_lock = threading.Lock()
+
+
 class CantMoveThereException(Exception):
     """Exception lancée quand un joueur ne peut pas se rendre sur une case."""
 
 
 class Player:
-    """Représente la stratégie d'une équipe."""
+    """
+    Représente la stratégie d'une équipe.
+
+    La partie passée à `play` est une copie, partagée entre tous les joueurs qui
+    décident au même instant : elle ne doit pas être modifiée.
+    """
 
     NAME = "Donne-moi un nom !"
 
+    # Temps de réflexion maximal pour une action, en secondes
+    # (`None` pour ne pas limiter le temps, par exemple avec un débogueur)
+    TIME_BUDGET: Optional[float] = 0.100
+
+    # Vrai si la stratégie décide pour plusieurs parties à la fois avec `play_batch`
+    BATCHED = False
+
+    # Vrai si `play` ne dépend que de la partie observée (ni hasard, ni mémoire
+    # entre deux décisions) : ses décisions sont alors gardées en cache, et
+    # rejouées quand le même état se présente à nouveau
+    PURE = False
+    # Nombre maximal de décisions en cache, pour toutes les instances de la stratégie
+    CACHE_SIZE = 100_000
+
     def __init__(self):
         """Représente la stratégie d'une équipe."""
         self.game: Optional[Game] = None
         self.player_entity: Optional[entities.PlayerEntity] = None
+        # Les dépassements du temps de réflexion : (instant du jeu, durée)
+        self.overruns: List[Tuple[Fraction, float]] = []
 
     def next_action(self):
-        """Renvoie l'action suivante du joueur."""
+        """Renvoie l'action suivante du joueur, ou `WAIT` s'il réfléchit trop."""
+        if not self.PURE:
+            return self._next_action()
+
+        cache = self.decision_cache()
+        key = self._decision_key()
+        action = cache.get(key)
+        if action is None:
+            overruns = len(self.overruns)
+            action = self._next_action()
+            # Une décision interrompue n'est pas celle de la stratégie
+            if len(self.overruns) == overruns:
+                cache.put(key, action)
+        return action
+
+    @classmethod
+    def decision_cache(cls) -> zobrist.TranspositionTable:
+        """Le cache des décisions de la stratégie, partagé par ses instances."""
+        if "_decision_cache" not in cls.__dict__:
+            with _decision_cache_lock:
+                if "_decision_cache" not in cls.__dict__:
+                    cls._decision_cache = zobrist.TranspositionTable(cls.CACHE_SIZE)
+        return cls._decision_cache
+
+    def _decision_key(self) -> int:
+        """Identifie l'état observé : hachage, temps et avancement des actions."""
+        progress = sorted(
+            (entity.TILE, entity.x, entity.y, entity.action_progress)
+            for entity in self.game.entities
+            if isinstance(entity, entities.MovingEntity)
+        )
+        return hash((self.game.hash, self.color, self.game.t, tuple(progress)))
+
+    def _next_action(self) -> Action:
+        """Appelle `play` en limitant son temps de réflexion."""
         t = perf_counter()
-        action = self.play(self.game)
+        try:
+            with time_limit(self.TIME_BUDGET):
+                action = self.play(self.game)
+        except DecisionTimeout:
+            action = Action.WAIT
         dt = perf_counter() - t
-        if dt >= 0.100:
-            print(f"/!\\ Temps de 100 ms dépassé pour {self.NAME} : {dt} s")
+        if self.TIME_BUDGET is not None and dt >= self.TIME_BUDGET:
+            self.overruns.append((self.game.t, dt))
+            print(
+                f"/!\\ Temps de {self.TIME_BUDGET * 1000:.0f} ms dépassé pour"
+                f" {self.NAME} : {dt} s"
+            )
+            action = Action.WAIT
         return action
 
     def play(self, game: Game) -> Action:
         """Choisit la prochaine action du joueur, en renvoyant une constante d'action."""
         return Action.WAIT
 
+    def next_actions(
+        self, states: List[Tuple[Game, entities.PlayerEntity]]
+    ) -> List[Action]:
+        """Renvoie les actions de `play_batch`, ou `WAIT` s'il réfléchit trop."""
+        budget = None
+        if self.TIME_BUDGET is not None:
+            budget = self.TIME_BUDGET * len(states)
+        t = perf_counter()
+        try:
+            with time_limit(budget):
+                actions = list(self.play_batch(states))
+        except DecisionTimeout:
+            actions = []
+        dt = perf_counter() - t
+        if budget is not None and dt >= budget:
+            self.overruns.append((states[0][0].t, dt))
+            print(
+                f"/!\\ Temps de {budget * 1000:.0f} ms dépassé pour"
+                f" {self.NAME} : {dt} s"
+            )
+            actions = []
+        if len(actions) != len(states):
+            actions = [Action.WAIT] * len(states)
+        return actions
+
+    def play_batch(
+        self, states: List[Tuple[Game, entities.PlayerEntity]]
+    ) -> List[Action]:
+        """
+        Choisit une action pour chaque état `(partie, entité du joueur)`.
+
+        Les stratégies qui déclarent `BATCHED = True` sont appelées une seule fois
+        pour toutes les décisions en attente des parties jouées en même temps, et
+        disposent de `TIME_BUDGET` secondes par décision.
+        """
+        actions = []
+        for game, player_entity in states:
+            self.game = game
+            self.player_entity = player_entity
+            actions.append(self.play(game))
+        return actions
+
     def is_action_valid(self, action: Action) -> bool:
         """Vérifie qu'une action est valide."""
         return self.game.is_action_valid(self.player_entity, action)
@@ -94,6 +209,72 @@ class Player:
         return self.player_entity.color
 
 
+class EntityRow:
+    """Vue en lecture d'une ligne de la grille plate des entités, sans copie."""
+
+    __slots__ = ("cells", "start", "size")
+
+    def __init__(self, cells: List[Tuple[entities.Entity, ...]], start: int, size: int):
+        """Crée une vue sur les `size` cases de `cells` à partir de `start`."""
+        self.cells = cells
+        self.start = start
+        self.size = size
+
+    def __getitem__(self, x: int) -> Tuple[entities.Entity, ...]:
+        """Renvoie les entités de la case `x` de la ligne."""
+        if x < 0:
+            x += self.size
+        # Sans ce test, on lirait une case de la ligne voisine
+        if not 0 <= x < self.size:
+            raise IndexError(x)
+        return self.cells[self.start + x]
+
+    def __iter__(self):
+        """Parcourt les cases de la ligne."""
+        start = self.start
+        end = start + self.size
+        return iter(self.cells[start:end])
+
+    def __len__(self) -> int:
+        """Nombre de cases de la ligne."""
+        return self.size
+
+
+class EntityGrid:
+    """
+    Vue en lecture de la grille plate des entités, indexée comme une matrice.
+
+    `entity_grid[y][x]` renvoie le tuple des entités de la case `(x, y)`, sans
+    copier la ligne `y`. `Game.entities_at(x, y)` reste plus rapide.
+    """
+
+    def __init__(self, cells: List[Tuple[entities.Entity, ...]], size: int):
+        """Crée une vue sur les cases `cells`, rangées ligne par ligne."""
+        self.cells = cells
+        self.size = size
+        # Les vues des lignes, créées au premier accès : beaucoup de clones ne
+        # sont jamais lus ainsi
+        self._rows: Optional[List[EntityRow]] = None
+
+    def __getitem__(self, y: int) -> EntityRow:
+        """Renvoie la ligne `y` de la grille."""
+        rows = self._rows
+        if rows is None:
+            rows = self._rows = [
+                EntityRow(self.cells, y * self.size, self.size)
+                for y in range(self.size)
+            ]
+        return rows[y]
+
+    def __iter__(self):
+        """Parcourt les lignes de la grille."""
+        return (self[y] for y in range(self.size))
+
+    def __len__(self) -> int:
+        """Nombre de lignes de la grille."""
+        return self.size
+
+
 class Game:
     """
     Représente une partie de Perfect Aim.
@@ -110,9 +291,18 @@ class Game:
     MAX_DURATION = Fraction(120)
 
     def __init__(
-        self, players: List[Optional[Player]], seed: int = None, permutation: int = 0
+        self,
+        players: List[Optional[Player]],
+        seed: int = None,
+        permutation: int = 0,
+        executor: Optional[Executor] = None,
     ):
-        """Initialise une partie et crée une carte."""
+        """
+        Initialise une partie et crée une carte.
+
+        Si `executor` est donné, les joueurs qui décident au même instant réfléchissent
+        en parallèle.
+        """
         assert (
             self.MIN_PLAYERS
             <= sum(1 if p is not None else 0 for p in players)
@@ -136,12 +326,25 @@ class Game:
 
         # Les matrices du jeu
         self.background = deepcopy(self.tile_grid)
-        self.entity_grid: List[List[Set[entities.Entity]]] = [
-            [set() for x in range(self.size)] for y in range(self.size)
-        ]
-
-        # Les actions passées
+        # Le même terrain octet par octet, ligne par ligne, tenu à jour avec
+        # `background` pour être copié d'un bloc (voir `encoder` et `sandbox`)
+        self.terrain = bytearray(tile for row in self.background for tile in row)
+        # Les entités de chaque case, dans une seule liste : la case `(x, y)` est à
+        # l'indice `y * size + x`, et contient un tuple de quelques entités
+        self.cells: List[Tuple[entities.Entity, ...]] = [()] * (self.size * self.size)
+        self.entity_grid = EntityGrid(self.cells, self.size)
+        # Les cases dont le terrain ou le contenu a changé, voir `pop_dirty`
+        self.dirty: Set[Tuple[int, int]] = set()
+
+        # Les actions passées, et celles choisies mais pas encore jouées
         self.past_actions = {p.TILE: [] for p in entities.players}
+        self.executor = executor
+        self._decisions: Dict[Tile, Action] = {}
+        # Durée de l'étape en cours, si elle attend des décisions
+        self._pending_dt: Optional[Fraction] = None
+
+        # Le hachage de Zobrist de la partie, tenu à jour à chaque changement
+        self.hash = 0
 
         # Crée les joueurs et des objets
         self._create_entities(players)
@@ -149,81 +352,93 @@ class Game:
     def update(self, elapsed_time: float):
         """Calcule toutes les updates qui ont eu lieu en `elapsed_time` secondes."""
         # On arrondit à la ms la plus proche, pour avoir des fractions petites
-        elapsed_time = Fraction(round(elapsed_time * 1000), 1000)
-        # On applique les updates itérativement, car on a discrétisé le temps
-        while elapsed_time > 0:
-
-            # Si la partie est finie, pas besoin d'update
-            if self.over:
+        until = self.t + Fraction(round(elapsed_time * 1000), 1000)
+        # Les joueurs sont interrogés à chaque fois que des décisions sont dues
+        while True:
+            colors = self._advance(until)
+            if len(colors) == 0:
                 return
-
-            # Temps jusqu'à la prochaine update
-            dt = min(
-                [
-                    entity.time_before_next_update
-                    for entity in self.entities
-                    if isinstance(entity, entities.MovingEntity)
-                ]
-                + [elapsed_time, int(self.t + 1) - self.t]
-            )
-            # dt vaut la plus petite durée avant un évènement
-            # (changement de case par exemple)
-
-            # Mise à jour du terrain
-            self._add_lava(dt)
-            self._add_collectibles()
-
-            self.t += dt
-
-            # Mise à jour des entités
-            for entity in sorted(self.entities, key=lambda e: e.TILE):
-                if entity in self.entities and isinstance(
-                    entity, entities.MovingEntity
-                ):
-                    entity.update(self, dt)
-                self._update_grid(entity.x, entity.y)
-
-            # Il ne reste qu'un joueur en vie ?
-            player_entities = list(self.player_entities)
-            if len(player_entities) == 1:
-                winner = player_entities[0]
-                self.over = True
-                self.winner = self.players[winner.color]
-            elif len(player_entities) == 0:
-                self.over = True
-
-            # Si dt < elapsed_time, il reste des updates à traiter
-            elapsed_time -= dt
+            self.submit_actions(self.player_actions(colors))
+
+    def step_until_decision(self, until: Fraction = None) -> Dict[Tile, Game]:
+        """
+        Avance la partie jusqu'à ce qu'au moins un joueur doive décider.
+
+        Renvoie les joueurs qui doivent décider, associés à la copie du jeu qu'ils
+        observent, ou un dictionnaire vide si la partie est finie ou si l'instant
+        `until` est atteint. La partie reprend avec `submit_actions`.
+        """
+        colors = self._advance(until)
+        if len(colors) == 0:
+            return {}
+        clone = deepcopy(self)
+        return {color: clone for color in colors}
+
+    def submit_actions(self, actions: Dict[Tile, Action]):
+        """Transmet les actions des joueurs qui devaient décider, et termine l'étape."""
+        if self._pending_dt is None:
+            raise RuntimeError("Aucun joueur n'attend de décision.")
+        dt = self._pending_dt
+        self._pending_dt = None
+        self._decisions.update(actions)
+        self._update_entities(dt)
+        self._decisions.clear()
+
+    def player_actions(self, colors: List[Tile]) -> Dict[Tile, Action]:
+        """Demande leur prochaine action aux `Player` des couleurs données."""
+        players = self._update_player_clones(colors)
+        if self.executor is None or len(players) == 1:
+            actions = [player.next_action() for player in players]
+        else:
+            actions = list(self.executor.map(lambda p: p.next_action(), players))
+        return dict(zip(colors, actions))
 
     def move_entity(self, entity: entities.MovingEntity, old_x: int, old_y: int):
         """Déplace l'entité sur la grille des entités `entity_grid`."""
-        self.entity_grid[old_y][old_x].remove(entity)
-        self.entity_grid[entity.y][entity.x].add(entity)
+        self._unplace(entity, old_x, old_y)
+        self._place(entity, entity.x, entity.y)
         self._update_grid(old_x, old_y)
+        self._update_grid(entity.x, entity.y)
+        self.hash ^= zobrist.entity_key(entity, old_x, old_y)
+        self.hash ^= zobrist.entity_key(entity, entity.x, entity.y)
 
     def remove_entity(self, entity: entities.Entity):
         """Supprime l'entité du jeu."""
         if entity in self.entities:
             self.entities.remove(entity)
-            self.entity_grid[entity.y][entity.x].remove(entity)
+            self._unplace(entity, entity.x, entity.y)
+            self.hash ^= zobrist.entity_key(entity, entity.x, entity.y)
+            if isinstance(entity, entities.PlayerEntity):
+                self.hash ^= zobrist.player_key(entity)
         self._update_grid(entity.x, entity.y)
 
     def next_action(self, entity: entities.PlayerEntity) -> Action:
         """Renvoie la prochaine action du joueur."""
-        player = self._update_player_clone(entity.color)
-        action = player.next_action()
+        if entity.color not in self._decisions:
+            self._decisions.update(self.player_actions([entity.color]))
+        action = self._decisions.pop(entity.color)
         if not isinstance(action, Action) or not self.is_action_valid(entity, action):
             action = Action.WAIT
-            print(f"/!\\ Action invalide pour le joueur {player.NAME}")
+            name = self.players[entity.color].NAME
+            print(f"/!\\ Action invalide pour le joueur {name}")
         self.past_actions[entity.color].append(action)
         return action
 
+    def set_action(self, entity: entities.PlayerEntity, action: Action):
+        """Change l'action en cours du joueur."""
+        self.hash ^= zobrist.action_key(entity, entity.action)
+        entity.action = action
+        self.hash ^= zobrist.action_key(entity, entity.action)
+
     def collect(self, player: Player, collectible: entities.CollectableEntity):
         """Ramasse l'object `collectible` pour le joueur `player`."""
+        self.hash ^= zobrist.stats_key(player)
         collectible.collect(player)
+        self.hash ^= zobrist.stats_key(player)
         self.entities.remove(collectible)
-        self.entity_grid[collectible.y][collectible.x].remove(collectible)
+        self._unplace(collectible, collectible.x, collectible.y)
         self._update_grid(collectible.x, collectible.y)
+        self.hash ^= zobrist.entity_key(collectible, collectible.x, collectible.y)
 
     def player_attacks(self, player: entities.PlayerEntity, action: Action):
         """Lance une boule de feu pour le joueur `player`."""
@@ -233,8 +448,9 @@ class Game:
                 player.x, player.y, action.to_movement(), player.color
             )
             self.entities.add(fireball)
-            self.entity_grid[fireball.y][fireball.x].add(fireball)
+            self._place(fireball, fireball.x, fireball.y)
             self._update_grid(fireball.x, fireball.y)
+            self.hash ^= zobrist.entity_key(fireball, fireball.x, fireball.y)
 
         if player.super_fireballs > 0:
             for action in (
@@ -244,7 +460,9 @@ class Game:
                 Action.ATTACK_RIGHT,
             ):
                 throw_fireball(action)
+            self.hash ^= zobrist.stats_key(player)
             player.super_fireballs -= 1
+            self.hash ^= zobrist.stats_key(player)
 
         else:
             throw_fireball(action)
@@ -254,9 +472,10 @@ class Game:
     ):
         """Inflige un point de dégât."""
         if player_entity.shield:
+            self.hash ^= zobrist.stats_key(player_entity)
             player_entity.shield = False
+            self.hash ^= zobrist.stats_key(player_entity)
             self.remove_entity(fireball)
-            self._update_grid(player_entity.x, player_entity.y)
         else:
             self.remove_entity(player_entity)
 
@@ -281,7 +500,7 @@ class Game:
             x, y = action.apply((player.x, player.y))
             try:
                 if self.background[y][x] == Tile.WALL or any(
-                    isinstance(e, entities.PlayerEntity) for e in self.entity_grid[y][x]
+                    isinstance(e, entities.PlayerEntity) for e in self.entities_at(x, y)
                 ):
                     raise CantMoveThereException()
             except IndexError:
@@ -330,6 +549,21 @@ class Game:
                 past_actions.append(None)
         return (self._grid.seed, self.permutation, names, past_actions)
 
+    @staticmethod
+    def starting_positions(size: int, permutation: int) -> List[Tuple[int, int]]:
+        """Les points de départ des joueurs, dans l'ordre des couleurs."""
+        coords = [
+            (1, 1),
+            (size - 2, size - 2),
+            (size - 2, 1),
+            (1, size - 2),
+        ]
+        i = permutation
+        coords[0], coords[i % 4] = coords[i % 4], coords[0]
+        coords[1], coords[i % 3 + 1] = (coords[i % 3 + 1], coords[1])
+        coords[2], coords[i % 2 + 2] = (coords[i % 2 + 2], coords[2])
+        return coords
+
     @property
     def player_entities(self) -> List[entities.PlayerEntity]:
         """Les `PlayerEntities` encore en vie."""
@@ -338,30 +572,53 @@ class Game:
             key=lambda player: player.color,
         )
 
+    def entities_at(self, x: int, y: int) -> Tuple[entities.Entity, ...]:
+        """Renvoie les entités de la case `(x, y)`."""
+        size = self.size
+        if not (0 <= x < size and 0 <= y < size):
+            raise IndexError((x, y))
+        return self.cells[y * size + x]
+
+    def _place(self, entity: entities.Entity, x: int, y: int):
+        """Ajoute l'entité à la case `(x, y)` de la grille des entités."""
+        self.cells[y * self.size + x] += (entity,)
+
+    def _unplace(self, entity: entities.Entity, x: int, y: int):
+        """Retire l'entité de la case `(x, y)` de la grille des entités."""
+        i = y * self.size + x
+        self.cells[i] = tuple(e for e in self.cells[i] if e is not entity)
+
     def _update_grid(self, x: int, y: int):
-        """Met à jour la grille aux coordonnées données."""
-        if len(self.entity_grid[y][x]) == 0:
-            self.tile_grid[y][x] = self.background[y][x]
+        """Met à jour la grille aux coordonnées données, après un changement."""
+        cell = self.cells[y * self.size + x]
+        if len(cell) == 0:
+            tile = self.background[y][x]
+        elif len(cell) == 1:
+            tile = next(iter(cell)).TILE
         else:
-            self.tile_grid[y][x] = max(entity.TILE for entity in self.entity_grid[y][x])
+            tile = max(entity.TILE for entity in cell)
+        if tile != self.tile_grid[y][x]:
+            self.tile_grid[y][x] = tile
+            self.dirty.add((x, y))
+
+    def pop_dirty(self) -> Set[Tuple[int, int]]:
+        """
+        Renvoie les coordonnées des cases modifiées depuis le dernier appel.
+
+        Une case est modifiée si son terrain ou sa case de `tile_grid` a changé :
+        l'interface ou un encodeur n'a besoin de traiter que celles-ci.
+        """
+        dirty = self.dirty
+        self.dirty = set()
+        return dirty
 
     def _create_entities(self, players: List[Optional[Player]]):
         """Ajoute les joueurs et les entitiés sur les grilles."""
         # Les joueurs, avec une potentielle permutation des points de départ
-        coords = [
-            (1, 1),
-            (self.size - 2, self.size - 2),
-            (self.size - 2, 1),
-            (1, self.size - 2),
-        ]
-        i = self.permutation
-        coords[0], coords[i % 4] = coords[i % 4], coords[0]
-        coords[1], coords[i % 3 + 1] = (coords[i % 3 + 1], coords[1])
-        coords[2], coords[i % 2 + 2] = (coords[i % 2 + 2], coords[2])
         for player, entity_constructor, coords in zip(
             players,
             entities.players,
-            coords,
+            self.starting_positions(self.size, self.permutation),
         ):
             x, y = coords
             if player is not None:
@@ -369,7 +626,7 @@ class Game:
                 self.entities.add(p)
                 self.players[p.color] = player
                 # On initialise le joueur, mais on ignore son action
-                self._update_player_clone(p.color)
+                self._update_player_clones([p.color])
 
         # Les objets
         d = {
@@ -384,11 +641,14 @@ class Game:
                 if self.tile_grid[y][x] in d:
                     self.entities.add(d[self.tile_grid[y][x]](x, y))
                     self.background[y][x] = Tile.FLOOR
+                    self.terrain[y * self.size + x] = Tile.FLOOR
 
         for entity in self.entities:
-            self.entity_grid[entity.y][entity.x].add(entity)
+            self._place(entity, entity.x, entity.y)
             self._update_grid(entity.x, entity.y)
 
+        self.hash = zobrist.full_hash(self)
+
     def _add_lava(self, dt: Fraction):
         """Ajoute de la lave après un certain temps."""
         if self.t + dt >= self.LAVA_FLOOD_START_TIME and int(
@@ -411,15 +671,23 @@ class Game:
                     ):
                         continue
                     if lava and self.background[y][x] == Tile.DAMAGED_FLOOR:
-                        self.background[y][x] = Tile.LAVA
-                        for entity in self.entity_grid[y][x].copy():
+                        self._set_background(x, y, Tile.LAVA)
+                        for entity in self.entities_at(x, y):
                             if not isinstance(entity, entities.Fireball):
                                 self.remove_entity(entity)
                         self._update_grid(x, y)
                     elif not lava and self.background[y][x] == Tile.FLOOR:
-                        self.background[y][x] = Tile.DAMAGED_FLOOR
+                        self._set_background(x, y, Tile.DAMAGED_FLOOR)
                         self._update_grid(x, y)
 
+    def _set_background(self, x: int, y: int, tile: Tile):
+        """Change le terrain de la case `(x, y)`."""
+        self.hash ^= zobrist.background_key(x, y, self.background[y][x])
+        self.background[y][x] = tile
+        self.terrain[y * self.size + x] = tile
+        self.hash ^= zobrist.background_key(x, y, tile)
+        self.dirty.add((x, y))
+
     def _add_collectibles(self):
         """Ajoute des objets s'il n'y en a plus."""
         d = {
@@ -448,18 +716,107 @@ class Game:
                 if self.tile_grid[y][x].is_floor():
                     entity = c.pop()(x, y)
                     self.entities.add(entity)
-                    self.entity_grid[y][x].add(entity)
+                    self._place(entity, x, y)
                     self._update_grid(x, y)
+                    self.hash ^= zobrist.entity_key(entity, x, y)
                 if len(c) == 0:
                     break
 
-    def _update_player_clone(self, color: Tile) -> Player:
-        """Met à jour le clone du jeu offert au joueur."""
+    def _advance(self, until: Optional[Fraction]) -> List[Tile]:
+        """Avance la partie, et renvoie les joueurs qui doivent décider."""
+        # Une étape est déjà en attente de décisions
+        if self._pending_dt is not None:
+            return [
+                entity.color
+                for entity in self.player_entities
+                if entity.is_action_over(self._pending_dt)
+            ]
+
+        # On applique les updates itérativement, car on a discrétisé le temps
+        while not self.over and (until is None or self.t < until):
+            dt = self._next_dt(until)
+
+            # Mise à jour du terrain
+            self._add_lava(dt)
+            self._add_collectibles()
+
+            self.t += dt
+
+            # Les joueurs dont l'action se termine décident à partir du même état
+            colors = [
+                entity.color
+                for entity in self.player_entities
+                if entity.is_action_over(dt)
+            ]
+            if len(colors) > 0:
+                self._pending_dt = dt
+                return colors
+
+            self._update_entities(dt)
+
+        return []
+
+    def _next_dt(self, until: Optional[Fraction]) -> Fraction:
+        """Temps jusqu'à la prochaine update."""
+        moving = [
+            entity
+            for entity in self.entities
+            if isinstance(entity, entities.MovingEntity)
+        ]
+        # dt vaut la plus petite durée avant un évènement
+        # (changement de case par exemple)
+        events = [entity.time_before_next_update for entity in moving]
+        if until is not None:
+            events.append(until - self.t)
+
+        if all(entity.action == Action.WAIT for entity in moving):
+            # Tous les joueurs attendent et il n'y a pas de boule de feu : rien ne
+            # change avant la prochaine décision ou la prochaine étape de lave
+            lava = self._next_lava_step()
+            if lava is not None:
+                events.append(lava - self.t)
+        else:
+            events.append(int(self.t + 1) - self.t)
+        return min(events)
+
+    def _next_lava_step(self) -> Optional[Fraction]:
+        """Instant de la prochaine étape de l'inondation, `None` s'il n'y en a plus."""
+        n = max(
+            int(self.t / self.LAVA_STEP_DURATION) + 1,
+            ceil(self.LAVA_FLOOD_START_TIME / self.LAVA_STEP_DURATION),
+        )
+        t = n * self.LAVA_STEP_DURATION
+        # Même calcul de l'anneau que dans `_add_lava`
+        step = int((t - self.LAVA_FLOOD_START_TIME) / self.LAVA_STEP_DURATION)
+        if 1 + step // 2 >= self.size // 2:
+            return None
+        return t
+
+    def _update_entities(self, dt: Fraction):
+        """Met à jour les entités, et regarde si la partie est finie."""
+        for entity in sorted(self.entities, key=lambda e: e.TILE):
+            if entity in self.entities and isinstance(entity, entities.MovingEntity):
+                entity.update(self, dt)
+
+        # Il ne reste qu'un joueur en vie ?
+        player_entities = list(self.player_entities)
+        if len(player_entities) == 1:
+            winner = player_entities[0]
+            self.over = True
+            self.winner = self.players[winner.color]
+        elif len(player_entities) == 0:
+            self.over = True
+
+    def _update_player_clones(self, colors: List[Tile]) -> List[Player]:
+        """Met à jour le clone du jeu offert aux joueurs, un seul pour tous."""
         clone = deepcopy(self)
-        player = self.players[color]
-        player.game = clone
-        player.player_entity = clone.player_entity_from_color(color)
-        return player
+        players = []
+        for color in colors:
+            player = self.players[color]
+            player.game = clone
+            player.player_entity = clone.player_entity_from_color(color)
+            players.append(player)
+        return players
 
     def __deepcopy__(self, memo: Dict[int, object]):
         """Assure une copie profonde efficace de l'objet."""
@@ -470,19 +827,22 @@ class Game:
         clone.size = self.size
         clone.t = self.t
         clone.winner = self.winner
+        clone.hash = self.hash
 
         # Objets profonds
         clone.players = {}
         clone.background = [[tile for tile in row] for row in self.background]
+        clone.terrain = self.terrain[:]
         clone.tile_grid = [[tile for tile in row] for row in self.tile_grid]
-        clone.entity_grid = [
-            [set() for _ in range(clone.size)] for _ in range(clone.size)
-        ]
-        clone.entities = set()
-        for entity in self.entities:
-            e = copy(entity)
-            clone.entities.add(e)
-            clone.entity_grid[e.y][e.x].add(e)
+        clone.dirty = set()
+        copies = {entity: copy(entity) for entity in self.entities}
+        clone.entities = set(copies.values())
+        # Seules les cases occupées sont reconstruites, dans le même ordre
+        clone.cells = list(self.cells)
+        for e in copies.values():
+            i = e.y * clone.size + e.x
+            clone.cells[i] = tuple(copies[entity] for entity in self.cells[i])
+        clone.entity_grid = EntityGrid(clone.cells, clone.size)
 
         return clone
 
@@ -521,15 +881,14 @@ class GameReplay(Game):
                 players.append(None)
         super().__init__(players, seed, permutation)
 
-    def next_action(self, entity: entities.PlayerEntity) -> Action:
-        """Renvoie la prochaine action du joueur."""
-        action = Action.WAIT
-        try:
-            action = self.history[entity.color].pop(0)
-        except IndexError:
-            pass
-        self.past_actions[entity.color].append(action)
-        return action
+    def player_actions(self, colors: List[Tile]) -> Dict[Tile, Action]:
+        """Renvoie les actions enregistrées des joueurs."""
+        actions = {}
+        for color in colors:
+            actions[color] = Action.WAIT
+            if len(self.history[color]) > 0:
+                actions[color] = self.history[color].pop(0)
+        return actions
 
 
 if __name__ == "__main__":
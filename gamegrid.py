@@ -32,52 +32,67 @@ class Tile(IntEnum):
 
     def is_floor(self) -> bool:
         """Renvoie vrai si `self` correspond à du sol."""
-        return self in (Tile.FLOOR, Tile.DAMAGED_FLOOR)
+        return self._is_floor
 
     def is_background(self) -> bool:
         """Renvoie vrai si `self` correspond au fond du plateau."""
-        return self in (Tile.FLOOR, Tile.WALL, Tile.LAVA, Tile.DAMAGED_FLOOR)
+        return self._is_background
 
     def is_collectible(self) -> bool:
         """Renvoie vrai si `self` correspond à un objet."""
-        return self in (
-            Tile.SPEEDBOOST,
-            Tile.SPEEDPENALTY,
-            Tile.COIN,
-            Tile.SUPER_FIREBALL,
-            Tile.SHIELD,
-        )
+        return self._is_collectible
 
     def is_bonus(self) -> bool:
         """Renvoie vrai si `self` correspond à un objet positif."""
-        return self in (Tile.SPEEDBOOST, Tile.SUPER_FIREBALL, Tile.SHIELD)
+        return self._is_bonus
 
     def is_player(self) -> bool:
         """Renvoie vrai si `self` correspond à un joueur."""
-        return self in (
-            Tile.PLAYER_RED,
-            Tile.PLAYER_BLUE,
-            Tile.PLAYER_YELLOW,
-            Tile.PLAYER_GREEN,
-        )
+        return self._is_player
 
     def is_dangerous(self) -> bool:
         """Renvoie vrai si `self` représente un danger."""
-        return self in (
-            Tile.LAVA,
-            Tile.DAMAGED_FLOOR,
-            Tile.PLAYER_RED,
-            Tile.PLAYER_BLUE,
-            Tile.PLAYER_YELLOW,
-            Tile.PLAYER_GREEN,
-            Tile.FIREBALL,
-        )
+        return self._is_dangerous
 
     def __repr__(self) -> str:
         """REMOVE."""
         return "Tile." + self.name
 
 
+# Les prédicats de `Tile` sont appelés à chaque case parcourue par les stratégies :
+# leurs résultats sont calculés une fois pour toutes et rangés dans chaque case
+_PREDICATES = {
+    "_is_floor": (Tile.FLOOR, Tile.DAMAGED_FLOOR),
+    "_is_background": (Tile.FLOOR, Tile.WALL, Tile.LAVA, Tile.DAMAGED_FLOOR),
+    "_is_collectible": (
+        Tile.SPEEDBOOST,
+        Tile.SPEEDPENALTY,
+        Tile.COIN,
+        Tile.SUPER_FIREBALL,
+        Tile.SHIELD,
+    ),
+    "_is_bonus": (Tile.SPEEDBOOST, Tile.SUPER_FIREBALL, Tile.SHIELD),
+    "_is_player": (
+        Tile.PLAYER_RED,
+        Tile.PLAYER_BLUE,
+        Tile.PLAYER_YELLOW,
+        Tile.PLAYER_GREEN,
+    ),
+    "_is_dangerous": (
+        Tile.LAVA,
+        Tile.DAMAGED_FLOOR,
+        Tile.PLAYER_RED,
+        Tile.PLAYER_BLUE,
+        Tile.PLAYER_YELLOW,
+        Tile.PLAYER_GREEN,
+        Tile.FIREBALL,
+    ),
+}
+for _tile in Tile:
+    for _name, _tiles in _PREDICATES.items():
+        setattr(_tile, _name, _tile in _tiles)
+
+
 class Matrix:
     """Opérations matricielles basiques."""
 
@@ -1,17 +1,21 @@
 """Gestion de l'affichage du jeu."""
 
+import os
+import queue
 import tkinter
 import tkinter.ttk as ttk
 from copy import deepcopy
-from multiprocessing import Pool, TimeoutError
+from multiprocessing import Pool, cpu_count
 from time import perf_counter
-from typing import Callable, List, Optional, Tuple, Type
+from typing import Callable, List, Optional, Type
 
 import entities
 import game
 import players
 from game import Action
 from gamegrid import Tile
+from store import ResultStore
+from tournament import Job, Result, leader_decided, play_games, tournament_jobs
 
 
 class AssetsManager:
@@ -380,9 +384,14 @@ class GameInterface:
         for p in self.player_panels:
             p.update()
 
-        # Le terrain
-        if self.background != self.game.background:
-            self.draw_background()
+        # Le terrain, seulement les cases qui ont changé
+        for x, y in self.game.pop_dirty():
+            if self.background[y][x] != self.game.background[y][x]:
+                self.background[y][x] = self.game.background[y][x]
+                self.canvas.itemconfig(
+                    self.background_images[y][x],
+                    image=self.assets_manager.tile(self.background, x, y),
+                )
 
         # Les entités
         self.draw_entities()
@@ -390,9 +399,11 @@ class GameInterface:
     def draw_background(self):
         """Dessine le fond du plateau."""
         self.background = deepcopy(self.game.background)
+        self.game.pop_dirty()
         self.canvas.delete("background")
-        for y in range(self.game.size):
-            for x in range(self.game.size):
+        # Les images du terrain, modifiées case par case ensuite
+        self.background_images = [
+            [
                 self.canvas.create_image(
                     x * self.assets_manager.TILE_SIZE + 1,
                     y * self.assets_manager.TILE_SIZE + 1,
@@ -400,6 +411,10 @@ class GameInterface:
                     anchor=tkinter.NW,
                     tags="background",
                 )
+                for x in range(self.game.size)
+            ]
+            for y in range(self.game.size)
+        ]
         self.canvas.lower("background")
 
     def draw_entities(self):
@@ -487,26 +502,66 @@ class GameInterface:
         update()
 
 
-def play_one_game(args: Tuple[int, List[Optional[Type[game.Player]]]]):
-    """Fonction parallélisable qui joue une partie."""
-    i, player_constructors = args
-    players = [cls() if cls is not None else None for cls in player_constructors]
+class ResultQueue:
+    """
+    Les lots terminés d'un tournoi, déposés par le fil d'exécution de `Pool`.
 
-    # On joue une partie jusqu'au bout
-    g = game.Game(players, permutation=i)
-    g.update(float(g.MAX_DURATION))
-    coins = [player.coins if player is not None else 0 for player in players]
+    Chaque lot écrit un octet dans un tube surveillé par Tk : la boucle principale
+    dort entre deux résultats, et `callback` est appelée à chaque arrivée. Sans
+    `createfilehandler` (sous Windows), `wait` relance `callback` à intervalles
+    réguliers.
+    """
 
-    # On renvoie l'indice du vainqueur et le nombre de pièces des joueurs
-    if g.winner is not None:
-        return players.index(g.winner), coins, g.replay()
-    return -1, coins, g.replay()
+    def __init__(self, master: tkinter.Tk, interval: int, callback: Callable):
+        """Crée la file, et le tube s'il peut être surveillé."""
+        self.master = master
+        self.interval = interval
+        self.callback = callback
+        self.outcomes: queue.Queue = queue.Queue()
+        self.watch = hasattr(master.tk, "createfilehandler")
+        if self.watch:
+            self.reader, self.writer = os.pipe()
+            master.tk.createfilehandler(self.reader, tkinter.READABLE, self.readable)
+
+    def put(self, outcome):
+        """Reçoit un lot terminé, hors du fil d'exécution de Tk."""
+        self.outcomes.put(outcome)
+        if self.watch:
+            os.write(self.writer, b"\0")
+
+    def get_nowait(self):
+        """Renvoie le prochain lot arrivé, ou lève `queue.Empty`."""
+        return self.outcomes.get_nowait()
+
+    def readable(self, fd: int, mask: int):
+        """Vide le tube, un octet par lot arrivé, puis lit les lots."""
+        os.read(fd, 4096)
+        self.callback()
+
+    def wait(self):
+        """Attend les prochains lots."""
+        if not self.watch:
+            self.master.after(self.interval, self.callback)
+
+    def close(self):
+        """Ferme le tube, une fois que plus aucun lot ne peut arriver."""
+        if self.watch:
+            self.master.tk.deletefilehandler(self.reader)
+            os.close(self.reader)
+            os.close(self.writer)
 
 
 class TournamentInterface:
     """Affiche l'avancement d'un grand nombre de parties."""
 
     NUMBER_OF_GAMES = 50
+    # Le tournoi s'arrête dès que le vainqueur est connu avec cette confiance,
+    # après au moins `MIN_GAMES` parties
+    ADAPTIVE = True
+    MIN_GAMES = 10
+    CONFIDENCE = 0.95
+    # Sans `createfilehandler`, intervalle de lecture des résultats en millisecondes
+    POLL_INTERVAL = 100
 
     LARGE_MARGIN = 16  # pixels
     SMALL_MARGIN = 8
@@ -543,6 +598,7 @@ class TournamentInterface:
         self.coins = [0] * len(self.players)
         self.replays = [None] * (len(self.players) + 1)
         self.winner: Optional[Tile] = None
+        self.finished = False
 
         # Widgets
         self.canvas = tkinter.Canvas(
@@ -657,7 +713,7 @@ class TournamentInterface:
         """Met à jour le canvas."""
         # Nombre de parties jouées
         played = sum(self.wins)
-        if played == self.NUMBER_OF_GAMES:
+        if self.finished:
             if self.winner is None:
                 self.counter_label.config(text=f"Match nul")
             else:
@@ -697,6 +753,21 @@ class TournamentInterface:
             self.canvas.itemconfigure(self.canvas_coins[row], text=self.coins[i])
             row += 1
 
+    def add_result(self, result: Result):
+        """Compte le résultat d'une partie."""
+        winner, coins, replay = result
+        self.wins[winner] += 1
+        self.coins = [a + b for a, b in zip(self.coins, coins)]
+        self.replays[winner] = replay
+
+    def decided(self) -> bool:
+        """Renvoie vrai si le vainqueur est connu sans jouer toutes les parties."""
+        return (
+            self.ADAPTIVE
+            and sum(self.wins) >= self.MIN_GAMES
+            and leader_decided(self.wins[:-1], self.CONFIDENCE)
+        )
+
     def compute_winner(self):
         """Détermine le vainqueur des parties jouées."""
         wins = 0
@@ -726,63 +797,111 @@ class TournamentInterface:
 
     def start(self, restart_callback: Callable, back_callback: Callable):
         """Lance les parties simultanées."""
-        stop = False
-        pool = Pool()
+        self.stopped = False
+        self.pool = Pool()
+        self.results = ResultQueue(self.master, self.POLL_INTERVAL, self.receive)
+
+        # Les parties déjà enregistrées ne sont pas rejouées
+        self.store = ResultStore()
+        jobs = tournament_jobs(self.NUMBER_OF_GAMES)
+        stored = self.store.results(self.players, jobs)
+        for result in stored.values():
+            self.add_result(result)
+        jobs = [job for job in jobs if job not in stored]
 
         # Callbacks des boutons
         def restart():
-            nonlocal stop
-            stop = True
-            pool.close()
+            self.stop()
             self.window.destroy()
             restart_callback()
 
         def settings():
-            nonlocal stop
-            stop = True
-            pool.close()
+            self.stop()
             self.window.destroy()
             back_callback()
 
         def close():
-            pool.terminate()
+            self.stop()
             self.master.destroy()
 
         self.restart_button.config(command=restart)
         self.back_button.config(command=settings)
         self.window.protocol("WM_DELETE_WINDOW", close)
 
-        # On joue les parties en parallèle
-        games = pool.imap_unordered(
-            play_one_game, [(i, self.players) for i in range(self.NUMBER_OF_GAMES)]
-        )
-
-        def update():
-            """Met à jour l'interface avec les données du backend."""
-            if stop:
-                return
+        self.schedule(jobs)
+        self.receive()
+
+    def schedule(self, jobs: List[Job]):
+        """Confie les parties `jobs` aux processus de `pool`."""
+        # On joue les parties en parallèle, une par une, sauf pour les stratégies
+        # qui décident pour plusieurs parties à la fois
+        step = len(jobs)
+        if any(p is not None and p.BATCHED for p in self.players):
+            step = min(cpu_count(), len(jobs))
+        for i in range(step):
+            self.pool.apply_async(
+                play_games,
+                ((jobs[i::step], self.players),),
+                callback=self.results.put,
+                error_callback=self.results.put,
+            )
+        self.remaining = step
 
+    def stop(self):
+        """Abandonne les parties en cours et libère les ressources."""
+        if self.stopped:
+            return
+        self.stopped = True
+        # `ResultQueue.put` ne touche pas à Tk : on peut attendre la fin de `pool`
+        self.pool.terminate()
+        # Plus aucun lot ne peut arriver : ceux déjà arrivés sont enregistrés
+        self.store_outcomes()
+        self.store.close()
+        self.results.close()
+
+    def store_outcomes(self) -> Optional[BaseException]:
+        """Enregistre et compte tous les lots arrivés, et renvoie la première erreur."""
+        error = None
+        while True:
             try:
-                while True:
-                    winner, coins, replay = games.next(0.0)
-                    self.wins[winner] += 1
-                    self.coins = [a + b for a, b in zip(self.coins, coins)]
-                    self.replays[winner] = replay
-
-            except TimeoutError:
-                played = sum(self.wins)
-                s = "" if played <= 1 else "s"
-                self.counter_label.config(text=f"{played} partie{s} jouée{s}")
-                self.master.after(16, update)
-            except StopIteration:
-                played = sum(self.wins)
-                s = "" if played <= 1 else "s"
-                self.counter_label.config(text=f"{played} partie{s} jouée{s}")
-                self.compute_winner()
-                self.game_over()
-                pool.close()
+                outcome = self.results.get_nowait()
+            except queue.Empty:
+                return error
+            self.remaining -= 1
+            if isinstance(outcome, BaseException):
+                if error is None:
+                    error = outcome
+                continue
+            for (seed, permutation), result, duration in outcome:
+                # Chaque partie est enregistrée dès qu'elle se termine
+                self.store.add(self.players, seed, permutation, result, duration)
+                self.add_result(result)
+
+    def receive(self):
+        """Compte les lots arrivés, et redessine une fois s'il y en a."""
+        if self.stopped:
+            return
 
-        update()
+        played = sum(self.wins)
+        # Tous les lots arrivés sont enregistrés, même si le vainqueur est connu :
+        # une partie calculée n'est jamais perdue
+        error = self.store_outcomes()
+        if error is not None:
+            self.stop()
+            raise error
+
+        if self.remaining > 0 and not self.decided():
+            if sum(self.wins) != played:
+                self.update()
+            self.results.wait()
+            return
+
+        # Toutes les parties sont jouées, ou le vainqueur est déjà connu : on ne
+        # lance plus rien, et les parties en cours sont abandonnées
+        self.stop()
+        self.finished = True
+        self.compute_winner()
+        self.game_over()
 
 
 class PlayerSelector:
@@ -863,9 +982,10 @@ class GameLauncher:
         button_play_1 = ttk.Button(
             frame, text="Jouer une partie", command=self.play_1_callback
         )
+        upto = "jusqu'à " if TournamentInterface.ADAPTIVE else ""
         button_play_many = ttk.Button(
             frame,
-            text=f"Jouer {TournamentInterface.NUMBER_OF_GAMES} parties",
+            text=f"Jouer {upto}{TournamentInterface.NUMBER_OF_GAMES} parties",
             command=self.play_many_callback,
         )
         button_play_1.grid(row=2, column=0, padx=8)
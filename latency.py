@@ -0,0 +1,251 @@
+"""
+Mesure du temps de décision des stratégies sur des situations enregistrées.
+
+Les situations de jeu sont extraites de replays, puis sérialisées pour que toutes
+les stratégies soient chronométrées sur exactement les mêmes états :
+
+    python latency.py record -o replays.json
+    python latency.py sample replays.json -o states.pickle
+    python latency.py run states.pickle
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import pickle
+import random
+import statistics
+import sys
+from copy import deepcopy
+from time import perf_counter
+from typing import Dict, List, Optional, Tuple, Type
+
+import game
+import players
+from game import Action, Player
+from gamegrid import Tile
+
+# Un état de jeu enregistré : la partie vue par le joueur, et sa couleur
+State = Tuple[game.Game, Tile]
+
+Replay = Tuple[int, int, List[Optional[str]], List[Optional[List[Action]]]]
+
+
+def replay_to_json(replay: Replay) -> Dict[str, object]:
+    """Convertit un replay en objet JSON."""
+    seed, permutation, names, past_actions = replay
+    return {
+        "seed": seed,
+        "permutation": permutation,
+        "names": names,
+        "actions": [
+            [action.name for action in actions] if actions is not None else None
+            for actions in past_actions
+        ],
+    }
+
+
+def replay_from_json(data: Dict[str, object]) -> Replay:
+    """Reconstruit un replay à partir d'un objet JSON."""
+    return (
+        data["seed"],
+        data["permutation"],
+        data["names"],
+        [
+            [Action[name] for name in actions] if actions is not None else None
+            for actions in data["actions"]
+        ],
+    )
+
+
+class SamplingGameReplay(game.GameReplay):
+    """Un replay qui enregistre les situations dans lesquelles un joueur décide."""
+
+    def __init__(self, replay: Replay):
+        """Initialise le replay et la liste des situations rencontrées."""
+        self.states: List[State] = []
+        super().__init__(replay)
+
+    def player_actions(self, colors: List[Tile]) -> Dict[Tile, Action]:
+        """Enregistre la situation avant de rejouer les actions."""
+        clone = deepcopy(self)
+        self.states.extend((clone, color) for color in colors)
+        return super().player_actions(colors)
+
+
+def record(
+    constructors: List[Type[Player]], seeds: List[int]
+) -> List[Dict[str, object]]:
+    """Joue une partie par graine, en faisant tourner les stratégies."""
+    replays = []
+    for i, seed in enumerate(seeds):
+        random.seed(seed)
+        lineup = [
+            constructors[(i + j) % len(constructors)]()
+            for j in range(game.Game.MAX_PLAYERS)
+        ]
+        g = game.Game(lineup, seed, permutation=i)
+        g.update(float(g.MAX_DURATION))
+        replays.append(replay_to_json(g.replay()))
+    return replays
+
+
+def sample(replays: List[Replay], n: int, seed: int = 0) -> List[State]:
+    """Tire `n` situations au hasard parmi celles des replays."""
+    states: List[State] = []
+    for replay in replays:
+        g = SamplingGameReplay(replay)
+        g.update(float(g.MAX_DURATION))
+        states.extend(g.states)
+    if n < len(states):
+        states = random.Random(seed).sample(states, n)
+    return states
+
+
+def time_decision(constructor: Type[Player], state: State, repeat: int) -> float:
+    """Chronomètre la décision d'une stratégie neuve sur la situation donnée."""
+    g, color = state
+    best = float("inf")
+    for _ in range(repeat):
+        # Une nouvelle copie à chaque fois, au cas où la stratégie la modifie
+        player = constructor()
+        player.game = deepcopy(g)
+        player.player_entity = player.game.player_entity_from_color(color)
+        t = perf_counter()
+        player.play(player.game)
+        best = min(best, perf_counter() - t)
+    return best
+
+
+def run(
+    constructors: List[Type[Player]], states: List[State], repeat: int
+) -> Dict[str, object]:
+    """
+    Chronomètre toutes les stratégies sur toutes les situations.
+
+    Chaque stratégie est comparée à son propre `TIME_BUDGET`, et jamais en
+    dépassement si elle n'a pas de limite (`None`).
+    """
+    names = [c.NAME for c in constructors]
+    budgets = {c.NAME: c.TIME_BUDGET for c in constructors}
+
+    def over_budget(name: str, value: float) -> bool:
+        return budgets[name] is not None and value > budgets[name]
+
+    timings: Dict[str, List[float]] = {name: [] for name in names}
+    per_state = []
+
+    for i, state in enumerate(states):
+        random.seed(i)
+        row = {}
+        for name, constructor in zip(names, constructors):
+            row[name] = time_decision(constructor, state, repeat)
+            timings[name].append(row[name])
+        per_state.append(
+            {
+                "state": i,
+                "t": float(state[0].t),
+                "color": state[1].name,
+                "timings": row,
+                "over_budget": [name for name in names if over_budget(name, row[name])],
+            }
+        )
+
+    aggregate = {}
+    for name in names:
+        values = sorted(timings[name])
+        aggregate[name] = {
+            "mean": statistics.mean(values),
+            "median": statistics.median(values),
+            "p95": values[min(len(values) - 1, int(len(values) * 0.95))],
+            "max": values[-1],
+            "budget": budgets[name],
+            "over_budget": sum(1 for value in values if over_budget(name, value)),
+        }
+
+    return {"states": per_state, "aggregate": aggregate}
+
+
+def print_report(report: Dict[str, object]):
+    """Affiche le rapport de `run`."""
+    flagged = [s for s in report["states"] if s["over_budget"]]
+    for state in flagged:
+        timings = ", ".join(
+            f"{name} {state['timings'][name] * 1000:.1f} ms"
+            for name in state["over_budget"]
+        )
+        print(f"/!\\ État {state['state']} ({state['t']:.2f} s) : {timings}")
+
+    print(
+        f"\n{'Stratégie':24} {'moyenne':>10} {'médiane':>10} {'p95':>10}"
+        f" {'max':>10} {'budget':>10} {'> budget':>9}"
+    )
+    for name, a in report["aggregate"].items():
+        budget = "-" if a["budget"] is None else f"{a['budget'] * 1000:.0f}ms"
+        print(
+            f"{name:24} {a['mean'] * 1000:8.2f}ms {a['median'] * 1000:8.2f}ms"
+            f" {a['p95'] * 1000:8.2f}ms {a['max'] * 1000:8.2f}ms"
+            f" {budget:>10} {a['over_budget']:9}"
+        )
+    print(
+        f"\n{len(flagged)} état(s) sur {len(report['states'])} dépassent le budget"
+        " d'une stratégie"
+    )
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Point d'entrée en ligne de commande."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    parser_record = subparsers.add_parser("record", help="enregistre des replays")
+    parser_record.add_argument("--output", "-o", required=True)
+    parser_record.add_argument("--games", type=int, default=10)
+
+    parser_sample = subparsers.add_parser("sample", help="extrait des situations")
+    parser_sample.add_argument("replays")
+    parser_sample.add_argument("--output", "-o", required=True)
+    parser_sample.add_argument("--states", type=int, default=200)
+    parser_sample.add_argument("--seed", type=int, default=0)
+
+    parser_run = subparsers.add_parser("run", help="chronomètre les stratégies")
+    parser_run.add_argument("states")
+    parser_run.add_argument("--output", "-o", help="fichier JSON du rapport")
+    parser_run.add_argument("--repeat", type=int, default=3)
+
+    args = parser.parse_args(argv)
+    constructors = players.list_player_constructors()
+
+    if args.command == "record":
+        replays = record(constructors, list(range(1, args.games + 1)))
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(replays, f)
+
+    elif args.command == "sample":
+        with open(args.replays, encoding="utf-8") as f:
+            replays = [replay_from_json(data) for data in json.load(f)]
+        states = sample(replays, args.states, args.seed)
+        with open(args.output, "wb") as f:
+            pickle.dump(states, f)
+        print(f"{len(states)} situations enregistrées")
+
+    elif args.command == "run":
+        with open(args.states, "rb") as f:
+            states = pickle.load(f)
+        report = run(constructors, states, args.repeat)
+        print_report(report)
+        if args.output is not None:
+            with open(args.output, "w", encoding="utf-8") as f:
+                json.dump(report, f, indent=2)
+        if any(s["over_budget"] for s in report["states"]):
+            return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    import os
+
+    os.chdir(os.path.dirname(os.path.abspath(__file__)))
+    sys.exit(main())
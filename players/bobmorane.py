@@ -32,6 +32,7 @@ class BobMorane(Player):
     """Le Véritable aventurier."""
 
     NAME = "Bob Morane"
+    PURE = True
 
     def play(self, game: Game) -> Action:
         """Cherche les autres joueurs pour attaquer et les boules de feu à éviter."""
@@ -7,6 +7,7 @@ class IndianaJones(Player):
     """Le célèbre aventurier."""
 
     NAME = "Indiana Jones"
+    PURE = True
 
     def play(self, game: Game) -> Action:
         """Cherche les objets les plus proches et se mettre en sécurité."""
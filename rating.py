@@ -0,0 +1,210 @@
+"""
+Classement Elo des stratégies, mis à jour au fil des parties.
+
+Une partie à plusieurs joueurs compte comme un match entre chaque paire de
+joueurs : le vainqueur bat tous les autres, et les autres sont départagés par
+leurs pièces, comme dans `TournamentInterface.compute_winner`. Le classement sert
+aussi à choisir les compositions suivantes : celles qui opposent des stratégies
+de niveau proche et qui se sont peu rencontrées apprennent le plus.
+
+    python rating.py --games 200 --size 4
+"""
+
+from __future__ import annotations
+
+import argparse
+import itertools
+import queue
+import sys
+from multiprocessing import Pool, cpu_count
+from typing import Dict, FrozenSet, List, Optional, Sequence, Tuple, Type
+
+import players
+from game import Player
+from roundrobin import Lineup, play_lineup
+from store import ResultStore
+from tournament import Result, tournament_job
+
+
+class Elo:
+    """Un classement Elo de stratégies, pour des parties de 2 à 4 joueurs."""
+
+    INITIAL_RATING = 1500.0
+    # Points en jeu dans une partie à deux joueurs
+    K = 32.0
+
+    def __init__(self, constructors: Sequence[Type[Player]]):
+        """Toutes les stratégies commencent au même classement."""
+        self.constructors = list(constructors)
+        self.ratings: Dict[Type[Player], float] = {
+            cls: self.INITIAL_RATING for cls in constructors
+        }
+        self.games: Dict[Type[Player], int] = {cls: 0 for cls in constructors}
+        # Nombre de parties jouées ensemble par chaque paire de stratégies
+        self.together: Dict[FrozenSet[Type[Player]], int] = {}
+
+    def expected(self, a: Type[Player], b: Type[Player]) -> float:
+        """Probabilité que `a` finisse devant `b`, d'après leurs classements."""
+        return 1 / (1 + 10 ** ((self.ratings[b] - self.ratings[a]) / 400))
+
+    def update(self, lineup: Lineup, result: Result):
+        """Prend en compte le résultat d'une partie de la composition `lineup`."""
+        winner, coins, _ = result
+        # Le vainqueur d'abord, puis les autres selon leurs pièces
+        scores = [(seat == winner, coins[seat]) for seat in range(len(lineup))]
+        k = self.K / (len(lineup) - 1)
+        deltas = [0.0] * len(lineup)
+        for i, j in itertools.combinations(range(len(lineup)), 2):
+            a, b = lineup[i], lineup[j]
+            if scores[i] == scores[j]:
+                outcome = 0.5
+            else:
+                outcome = float(scores[i] > scores[j])
+            delta = k * (outcome - self.expected(a, b))
+            deltas[i] += delta
+            deltas[j] -= delta
+            pair = frozenset((a, b))
+            self.together[pair] = self.together.get(pair, 0) + 1
+
+        # Les classements changent tous en même temps
+        for cls, delta in zip(lineup, deltas):
+            self.ratings[cls] += delta
+            self.games[cls] += 1
+
+    def information(self, a: Type[Player], b: Type[Player]) -> float:
+        """Ce qu'apprendrait une rencontre entre `a` et `b` : issue incertaine et rare."""
+        p = self.expected(a, b)
+        return p * (1 - p) / (1 + self.together.get(frozenset((a, b)), 0))
+
+    def next_lineup(self, size: int) -> Lineup:
+        """
+        Choisit la composition de `size` stratégies la plus informative.
+
+        La paire la plus informative est choisie, puis complétée une stratégie à
+        la fois par celle qui apporte le plus avec les stratégies déjà choisies.
+        """
+        if len(self.constructors) < 2:
+            raise ValueError("Il faut au moins 2 stratégies pour former une partie.")
+        chosen = list(
+            max(
+                itertools.combinations(self.constructors, 2),
+                key=lambda pair: self.information(*pair),
+            )
+        )
+        while len(chosen) < size:
+            chosen.append(
+                max(
+                    (cls for cls in self.constructors if cls not in chosen),
+                    key=lambda cls: sum(self.information(cls, c) for c in chosen),
+                )
+            )
+        # Toujours le même ordre, pour retrouver les parties enregistrées
+        return tuple(sorted(chosen, key=self.constructors.index))
+
+    def leaderboard(self) -> List[Tuple[Type[Player], float, int]]:
+        """Les stratégies, leur classement et leur nombre de parties, du meilleur."""
+        return sorted(
+            ((cls, self.ratings[cls], self.games[cls]) for cls in self.constructors),
+            key=lambda entry: entry[1],
+            reverse=True,
+        )
+
+
+def rank(
+    constructors: Sequence[Type[Player]],
+    games: int,
+    store: ResultStore,
+    size: int = 4,
+    processes: Optional[int] = None,
+) -> Elo:
+    """
+    Joue `games` parties choisies une à une, et renvoie le classement obtenu.
+
+    Chaque processus joue une partie à la fois : dès qu'une partie se termine, le
+    classement est mis à jour et la composition suivante est choisie. Les parties
+    déjà enregistrées sont reprises sans être rejouées.
+    """
+    if len(constructors) < 2 or size < 2:
+        raise ValueError("Il faut au moins 2 stratégies, et 2 joueurs par partie.")
+    elo = Elo(constructors)
+    size = min(size, len(constructors))
+    processes = processes or cpu_count()
+    # Indice de la prochaine partie de chaque composition
+    next_job: Dict[Lineup, int] = {}
+    outcomes: queue.Queue = queue.Queue()
+
+    played = 0
+    scheduled = 0
+    running = 0
+    with Pool(processes) as pool:
+        while played < games:
+            while running < processes and scheduled < games:
+                lineup = elo.next_lineup(size)
+                i = next_job.get(lineup, 0)
+                next_job[lineup] = i + 1
+                job = tournament_job(i)
+                scheduled += 1
+
+                stored = store.results(list(lineup), [job])
+                if job in stored:
+                    elo.update(lineup, stored[job])
+                    played += 1
+                    continue
+                pool.apply_async(
+                    play_lineup,
+                    (([job], list(lineup)),),
+                    callback=outcomes.put,
+                    error_callback=outcomes.put,
+                )
+                running += 1
+
+            if running == 0:
+                continue
+            outcome = outcomes.get()
+            running -= 1
+            if isinstance(outcome, BaseException):
+                raise outcome
+            lineup, lineup_outcomes = outcome
+            for (seed, permutation), result, duration in lineup_outcomes:
+                store.add(list(lineup), seed, permutation, result, duration)
+                elo.update(lineup, result)
+                played += 1
+            print(f"\r{played}/{games} parties", end="", file=sys.stderr)
+    print(file=sys.stderr)
+    return elo
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Point d'entrée en ligne de commande."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "--games", "-n", type=int, default=200, help="nombre total de parties"
+    )
+    parser.add_argument("--size", type=int, default=4, help="joueurs par partie")
+    parser.add_argument(
+        "--players", nargs="+", help="noms des stratégies à inclure (toutes sinon)"
+    )
+    parser.add_argument("--processes", type=int, help="nombre de processus")
+    args = parser.parse_args(argv)
+
+    constructors = players.list_player_constructors()
+    if args.players is not None:
+        constructors = [cls for cls in constructors if cls.NAME in args.players]
+
+    if len(constructors) < 2:
+        parser.error("il faut au moins 2 stratégies à classer")
+    if args.size < 2:
+        parser.error("il faut au moins 2 joueurs par partie")
+
+    with ResultStore() as store:
+        elo = rank(constructors, args.games, store, args.size, args.processes)
+    for i, (cls, rating, n) in enumerate(elo.leaderboard()):
+        print(f"{i + 1:>2}. {cls.NAME[:24]:24} {rating:7.0f}  {n:>5} parties")
+    return 0
+
+
+if __name__ == "__main__":
+    import os
+
+    os.chdir(os.path.dirname(os.path.abspath(__file__)))
+    sys.exit(main())
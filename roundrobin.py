@@ -0,0 +1,324 @@
+"""
+Tournoi toutes rondes entre les stratégies du dossier `players/`.
+
+Toutes les compositions de 2, 3 et 4 stratégies différentes jouent les mêmes
+parties, réparties sur tous les processeurs : les cartes se suivent, chacune
+jouée depuis tous ses départs différents (voir `tournament.balanced_jobs`), pour
+que l'avantage d'un point de départ ne profite pas toujours au même joueur.
+Les parties les plus longues sont lancées en premier, pour que les processus
+finissent en même temps. Le résultat est une table croisée :
+
+    python roundrobin.py --games 10
+
+Avec `--paired`, chaque carte est jouée depuis tous ses départs différents (voir
+`tournament.paired_jobs`), et les stratégies d'une composition sont comparées
+carte par carte : la chance de la carte s'annule dans les différences.
+"""
+
+from __future__ import annotations
+
+import argparse
+import itertools
+import math
+import sys
+from multiprocessing import Pool, cpu_count
+from typing import Dict, List, Optional, Sequence, Tuple, Type
+
+import players
+from game import Player
+from store import ResultStore
+from tournament import (
+    Job,
+    Outcome,
+    Result,
+    balanced_jobs,
+    paired_jobs,
+    play_games,
+)
+
+# Une composition : les stratégies des joueurs, dans l'ordre des couleurs
+Lineup = Tuple[Type[Player], ...]
+# Un lot de parties d'une même composition, calculé par un processus
+Task = Tuple[List[Job], List[Optional[Type[Player]]]]
+
+DEFAULT_SIZES = (2, 3, 4)
+
+# Quantile de la loi normale pour un intervalle de confiance à 95 %
+Z_95 = 1.96
+
+
+def list_lineups(
+    constructors: Sequence[Type[Player]], sizes: Sequence[int] = DEFAULT_SIZES
+) -> List[Lineup]:
+    """Toutes les compositions de `sizes` stratégies différentes."""
+    return [
+        lineup
+        for size in sizes
+        for lineup in itertools.combinations(constructors, size)
+    ]
+
+
+def expected_durations(
+    store: ResultStore, lineups: List[Lineup]
+) -> Dict[Lineup, float]:
+    """
+    Estime la durée d'une partie de chaque composition.
+
+    Chaque stratégie compte pour la durée moyenne par joueur des parties déjà
+    enregistrées où elle apparaît, ou pour 1 sans historique. Une composition
+    dure la somme de ses joueurs.
+    """
+    totals: Dict[str, float] = {}
+    counts: Dict[str, int] = {}
+    for names, duration in store.durations():
+        names = [name for name in names if name is not None]
+        for name in names:
+            totals[name] = totals.get(name, 0.0) + duration / len(names)
+            counts[name] = counts.get(name, 0) + 1
+
+    def cost(cls: Type[Player]) -> float:
+        name = f"{cls.__module__}.{cls.__qualname__}"
+        return totals[name] / counts[name] if name in counts else 1.0
+
+    return {lineup: sum(cost(cls) for cls in lineup) for lineup in lineups}
+
+
+def play_lineup(task: Task) -> Tuple[Lineup, List[Outcome]]:
+    """Fonction parallélisable qui joue un lot de parties d'une composition."""
+    return tuple(task[1]), play_games(task)
+
+
+def plan_round_robin(
+    constructors: Sequence[Type[Player]],
+    games: int,
+    store: ResultStore,
+    sizes: Sequence[int] = DEFAULT_SIZES,
+    batches: int = 1,
+    paired: bool = False,
+) -> Tuple[Dict[Lineup, Dict[Job, Result]], List[Task]]:
+    """
+    Prépare un tournoi toutes rondes.
+
+    Renvoie les résultats déjà enregistrés de chaque composition, et les lots de
+    parties restant à jouer, les plus longs d'abord. Les compositions avec une
+    stratégie `BATCHED` sont réparties en `batches` lots, les autres en lots d'une
+    partie. Si `paired` est vrai, chaque composition joue `games` cartes depuis
+    tous leurs départs différents.
+    """
+    lineups = list_lineups(constructors, sizes)
+    results: Dict[Lineup, Dict[Job, Result]] = {}
+    tasks: List[Task] = []
+    for lineup in lineups:
+        if paired:
+            jobs = paired_jobs(games, len(lineup))
+        else:
+            jobs = balanced_jobs(games, len(lineup))
+        stored = store.results(list(lineup), jobs)
+        results[lineup] = stored
+        pending = [job for job in jobs if job not in stored]
+        # Les stratégies `BATCHED` reçoivent plusieurs parties à la fois
+        step = len(pending)
+        if any(cls.BATCHED for cls in lineup):
+            step = min(batches, len(pending))
+        tasks += [(pending[i::step], list(lineup)) for i in range(step)]
+
+    # Les lots les plus longs d'abord : les derniers lancés sont les plus courts
+    durations = expected_durations(store, lineups)
+    tasks.sort(key=lambda task: durations[tuple(task[1])] * len(task[0]), reverse=True)
+    return results, tasks
+
+
+def round_robin(
+    constructors: Sequence[Type[Player]],
+    games: int,
+    store: ResultStore,
+    sizes: Sequence[int] = DEFAULT_SIZES,
+    processes: Optional[int] = None,
+    paired: bool = False,
+) -> Dict[Lineup, Dict[Job, Result]]:
+    """
+    Joue `games` parties de chaque composition, sauf celles déjà enregistrées.
+
+    Si `paired` est vrai, chaque composition joue `games` cartes depuis tous leurs
+    départs différents.
+    """
+    processes = processes or cpu_count()
+    results, tasks = plan_round_robin(
+        constructors, games, store, sizes, processes, paired
+    )
+
+    done = 0
+    with Pool(processes) as pool:
+        for lineup, outcomes in pool.imap_unordered(play_lineup, tasks):
+            for (seed, permutation), result, duration in outcomes:
+                store.add(list(lineup), seed, permutation, result, duration)
+                results[lineup][seed, permutation] = result
+            done += 1
+            print(f"\r{done}/{len(tasks)} lots joués", end="", file=sys.stderr)
+    if len(tasks) > 0:
+        print(file=sys.stderr)
+    return results
+
+
+def cross_table(
+    constructors: Sequence[Type[Player]], results: Dict[Lineup, Dict[Job, Result]]
+) -> Tuple[List[List[Tuple[int, int]]], List[Tuple[int, int]]]:
+    """
+    Compte les victoires de chaque stratégie face à chacune des autres.
+
+    La case `[a][b]` contient le nombre de parties gagnées par `a` parmi celles où
+    `a` et `b` jouaient ensemble, et le nombre de ces parties. La seconde liste
+    contient les victoires et les parties de chaque stratégie, toutes confondues.
+    """
+    index = {cls: i for i, cls in enumerate(constructors)}
+    n = len(constructors)
+    table = [[(0, 0) for _ in range(n)] for _ in range(n)]
+    totals = [(0, 0) for _ in range(n)]
+    for lineup, lineup_results in results.items():
+        for winner, _, _ in lineup_results.values():
+            for seat, cls in enumerate(lineup):
+                a = index[cls]
+                won = int(winner == seat)
+                wins, played = totals[a]
+                totals[a] = (wins + won, played + 1)
+                for other in lineup:
+                    if other is cls:
+                        continue
+                    b = index[other]
+                    wins, played = table[a][b]
+                    table[a][b] = (wins + won, played + 1)
+    return table, totals
+
+
+def print_cross_table(
+    constructors: Sequence[Type[Player]], results: Dict[Lineup, Dict[Job, Result]]
+):
+    """Affiche la table croisée, stratégies classées par taux de victoire."""
+    table, totals = cross_table(constructors, results)
+    order = sorted(
+        range(len(constructors)),
+        key=lambda i: totals[i][0] / max(totals[i][1], 1),
+        reverse=True,
+    )
+
+    print(f"{'':28}" + "".join(f"{rank + 1:>9}" for rank in range(len(order))))
+    for rank, a in enumerate(order):
+        cells = "".join(
+            f"{'-':>9}" if a == b else f"{table[a][b][0]:>4}/{table[a][b][1]:<4}"
+            for b in order
+        )
+        print(f"{rank + 1:>2}. {constructors[a].NAME[:24]:24}{cells}")
+
+    print()
+    for rank, a in enumerate(order):
+        wins, played = totals[a]
+        rate = wins / played if played > 0 else 0.0
+        print(
+            f"{rank + 1:>2}. {constructors[a].NAME[:24]:24} {wins:>5}/{played:<5}"
+            f" {rate:7.1%}"
+        )
+
+
+def map_scores(lineup_results: Dict[Job, Result], players: int) -> List[List[float]]:
+    """
+    La part des parties de chaque carte gagnées par chaque joueur.
+
+    Renvoie une liste par carte, qui contient le score de chacun des `players`
+    joueurs sur cette carte, tous départs confondus.
+    """
+    maps: Dict[int, List[int]] = {}
+    for (seed, _), (winner, _, _) in lineup_results.items():
+        maps.setdefault(seed, []).append(winner)
+    return [
+        [winners.count(seat) / len(winners) for seat in range(players)]
+        for _, winners in sorted(maps.items())
+    ]
+
+
+def mean_error(values: List[float]) -> Tuple[float, float]:
+    """La moyenne de `values` et son erreur type."""
+    n = len(values)
+    if n == 0:
+        return 0.0, math.inf
+    mean = sum(values) / n
+    if n == 1:
+        return mean, math.inf
+    variance = sum((value - mean) ** 2 for value in values) / (n - 1)
+    return mean, math.sqrt(variance / n)
+
+
+def print_paired_statistics(results: Dict[Lineup, Dict[Job, Result]]):
+    """
+    Affiche les statistiques appariées par carte de chaque composition.
+
+    Le score d'un joueur sur une carte est sa part des victoires depuis tous les
+    départs de la carte. Les écarts entre deux joueurs sont calculés carte par
+    carte : une carte facile pour tous ne compte pas. Les intervalles sont à 95 %,
+    et un écart dont l'intervalle ne contient pas 0 est marqué d'une étoile.
+    """
+    for lineup, lineup_results in results.items():
+        scores = map_scores(lineup_results, len(lineup))
+        print(
+            f"{', '.join(cls.NAME for cls in lineup)} :"
+            f" {len(scores)} cartes, {len(lineup_results)} parties"
+        )
+        for seat, cls in enumerate(lineup):
+            mean, error = mean_error([score[seat] for score in scores])
+            print(f"    {cls.NAME[:24]:24} {mean:7.1%} ± {Z_95 * error:.1%}")
+        for a, b in itertools.combinations(range(len(lineup)), 2):
+            mean, error = mean_error([score[a] - score[b] for score in scores])
+            mark = " *" if abs(mean) > Z_95 * error else ""
+            print(
+                f"    {lineup[a].NAME[:24]} - {lineup[b].NAME[:24]} :"
+                f" {mean:+.1%} ± {Z_95 * error:.1%}{mark}"
+            )
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Point d'entrée en ligne de commande."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "--games",
+        "-n",
+        type=int,
+        default=10,
+        help="parties par composition, ou cartes avec --paired",
+    )
+    parser.add_argument(
+        "--sizes",
+        type=int,
+        nargs="+",
+        default=list(DEFAULT_SIZES),
+        help="nombres de joueurs des compositions",
+    )
+    parser.add_argument(
+        "--players", nargs="+", help="noms des stratégies à inclure (toutes sinon)"
+    )
+    parser.add_argument("--processes", type=int, help="nombre de processus")
+    parser.add_argument(
+        "--paired",
+        action="store_true",
+        help="jouer chaque carte depuis tous ses départs et comparer carte par carte",
+    )
+    args = parser.parse_args(argv)
+
+    constructors = players.list_player_constructors()
+    if args.players is not None:
+        constructors = [cls for cls in constructors if cls.NAME in args.players]
+
+    with ResultStore() as store:
+        results = round_robin(
+            constructors, args.games, store, args.sizes, args.processes, args.paired
+        )
+    print_cross_table(constructors, results)
+    if args.paired:
+        print()
+        print_paired_statistics(results)
+    return 0
+
+
+if __name__ == "__main__":
+    import os
+
+    os.chdir(os.path.dirname(os.path.abspath(__file__)))
+    sys.exit(main())
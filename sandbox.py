@@ -0,0 +1,409 @@
+"""
+Exécution des stratégies dans des processus isolés.
+
+Chaque stratégie vit dans son propre processus, qui dure le temps de plusieurs
+parties. Le moteur écrit l'état du jeu une fois par étape dans une mémoire
+partagée, que les processus relisent sans passer par `pickle` : seules de petites
+commandes transitent par les tubes de communication.
+
+Une stratégie lente ou gourmande en mémoire ne ralentit donc plus que son propre
+processus, et une stratégie bloquée est tuée puis relancée. Avec l'exécuteur de
+l'arène, les joueurs qui décident au même instant réfléchissent en parallèle :
+
+    with Arena() as arena:
+        g = Game(arena.players(constructors), executor=arena.executor)
+"""
+
+from __future__ import annotations
+
+import struct
+from concurrent.futures import ThreadPoolExecutor
+from fractions import Fraction
+from multiprocessing import Pipe, Process, shared_memory
+from multiprocessing.connection import Connection
+from threading import Lock
+from time import perf_counter
+from typing import Dict, List, Optional, Type
+
+import entities
+import game
+import zobrist
+from game import Action, Player
+from gamegrid import Tile
+
+# En-tête : numéro de l'étape, temps (numérateur, dénominateur), taille, entités
+_HEADER = struct.Struct("<qqqii")
+
+# Une entité : tuile, x, y, action, vitesse et progression (fractions), bouclier,
+# pièces, super boules de feu, lanceur
+_ENTITY = struct.Struct("<bbbbqqqq?iib")
+
+_TILES = {tile.value: tile for tile in Tile}
+_ACTIONS = list(Action)
+_ACTION_INDEX = {action: i for i, action in enumerate(_ACTIONS)}
+
+_CONSTRUCTORS: Dict[Tile, type] = {
+    constructor.TILE: constructor
+    for constructor in (
+        *entities.players,
+        entities.Fireball,
+        entities.Coin,
+        entities.SpeedBoost,
+        entities.SpeedPenalty,
+        entities.SuperFireball,
+        entities.Shield,
+    )
+}
+
+
+class SharedSnapshot:
+    """L'état d'une partie, stocké dans une mémoire partagée."""
+
+    MAX_ENTITIES = 512
+
+    def __init__(self, size: int, name: Optional[str] = None):
+        """Crée la mémoire partagée, ou s'y attache si `name` est donné."""
+        self.size = size
+        length = _HEADER.size + size * size + _ENTITY.size * self.MAX_ENTITIES
+        if name is None:
+            self.memory = shared_memory.SharedMemory(create=True, size=length)
+        else:
+            self.memory = shared_memory.SharedMemory(name=name)
+        self.step = 0
+
+    @property
+    def name(self) -> str:
+        """Nom de la mémoire partagée, pour s'y attacher depuis un autre processus."""
+        return self.memory.name
+
+    def write(self, g: game.Game):
+        """Écrit l'état de la partie `g`."""
+        if len(g.entities) > self.MAX_ENTITIES:
+            raise ValueError(
+                f"{len(g.entities)} entités, la mémoire partagée n'en contient que"
+                f" {self.MAX_ENTITIES}."
+            )
+        buffer = self.memory.buf
+        self.step += 1
+        t = Fraction(g.t)
+        _HEADER.pack_into(
+            buffer,
+            0,
+            self.step,
+            t.numerator,
+            t.denominator,
+            g.size,
+            len(g.entities),
+        )
+        offset = _HEADER.size
+        end = offset + g.size * g.size
+        buffer[offset:end] = g.terrain
+        offset = end
+        for entity in g.entities:
+            speed = getattr(entity, "speed", Fraction(0))
+            progress = getattr(entity, "action_progress", Fraction(0))
+            _ENTITY.pack_into(
+                buffer,
+                offset,
+                entity.TILE,
+                entity.x,
+                entity.y,
+                _ACTION_INDEX[getattr(entity, "action", Action.WAIT)],
+                speed.numerator,
+                speed.denominator,
+                progress.numerator,
+                progress.denominator,
+                getattr(entity, "shield", False),
+                getattr(entity, "coins", 0),
+                getattr(entity, "super_fireballs", 0),
+                getattr(entity, "sender", Tile.INVALID),
+            )
+            offset += _ENTITY.size
+
+    def read(self) -> game.Game:
+        """Reconstruit une partie à partir de la mémoire partagée."""
+        buffer = self.memory.buf
+        step, numerator, denominator, size, n_entities = _HEADER.unpack_from(buffer, 0)
+        self.step = step
+
+        g: game.Game = game.Game.__new__(game.Game)
+        g.over = False
+        g.winner = None
+        g.size = size
+        g.t = Fraction(numerator, denominator)
+        g.players = {}
+
+        offset = _HEADER.size
+        end = offset + size * size
+        g.terrain = bytearray(buffer[offset:end])
+        cells = iter(g.terrain)
+        g.background = [[_TILES[next(cells)] for _ in range(size)] for _ in range(size)]
+        g.tile_grid = [row[:] for row in g.background]
+        g.cells = [()] * (size * size)
+        g.entity_grid = game.EntityGrid(g.cells, size)
+        g.entities = set()
+        g.dirty = set()
+        offset = end
+
+        for _ in range(n_entities):
+            (
+                tile,
+                x,
+                y,
+                action,
+                speed_numerator,
+                speed_denominator,
+                progress_numerator,
+                progress_denominator,
+                shield,
+                coins,
+                super_fireballs,
+                sender,
+            ) = _ENTITY.unpack_from(buffer, offset)
+            offset += _ENTITY.size
+
+            constructor = _CONSTRUCTORS[tile]
+            if constructor is entities.Fireball:
+                entity = constructor(x, y, _ACTIONS[action], _TILES[sender])
+            else:
+                entity = constructor(x, y)
+            if isinstance(entity, entities.MovingEntity):
+                entity.action = _ACTIONS[action]
+                entity.speed = Fraction(speed_numerator, speed_denominator)
+                entity.action_progress = Fraction(
+                    progress_numerator, progress_denominator
+                )
+            if isinstance(entity, entities.PlayerEntity):
+                entity.shield = shield
+                entity.coins = coins
+                entity.super_fireballs = super_fireballs
+
+            g.entities.add(entity)
+            g._place(entity, x, y)
+            g.tile_grid[y][x] = max(g.tile_grid[y][x], entity.TILE)
+
+        g.hash = zobrist.full_hash(g)
+        return g
+
+    def close(self, unlink: bool = False):
+        """Ferme la mémoire partagée, et la supprime si `unlink` est vrai."""
+        self.memory.close()
+        if unlink:
+            self.memory.unlink()
+
+
+def _serve(
+    constructor: Type[Player], size: int, memory_name: str, connection: Connection
+):
+    """Boucle du processus d'une stratégie."""
+    snapshot = SharedSnapshot(size, memory_name)
+    player = constructor()
+    g: Optional[game.Game] = None
+
+    while True:
+        command, *args = connection.recv()
+
+        if command == "play":
+            step, color = args
+            # Plusieurs joueurs peuvent décider sur la même étape
+            if g is None or snapshot.step != step:
+                g = snapshot.read()
+            player.game = g
+            player.player_entity = g.player_entity_from_color(_TILES[color])
+            overruns = len(player.overruns)
+            action = player.next_action()
+            if not isinstance(action, Action):
+                action = Action.WAIT
+            overrun = (
+                player.overruns[-1][1] if len(player.overruns) > overruns else None
+            )
+            connection.send((step, _ACTION_INDEX[action], overrun))
+
+        elif command == "reset":
+            player = constructor()
+            g = None
+
+        elif command == "stop":
+            snapshot.close()
+            return
+
+
+class SandboxPlayer(Player):
+    """Une stratégie exécutée dans son propre processus."""
+
+    # Au-delà de ce délai supplémentaire, le processus est considéré comme bloqué
+    GRACE_PERIOD = 0.050
+
+    def __init__(self, arena: Arena, constructor: Type[Player]):
+        """Lance le processus de la stratégie `constructor`."""
+        super().__init__()
+        self.arena = arena
+        self.constructor = constructor
+        self.NAME = constructor.NAME
+        self.TIME_BUDGET = constructor.TIME_BUDGET
+        self.process: Optional[Process] = None
+        self.connection: Optional[Connection] = None
+        self.start()
+
+    def start(self):
+        """Lance (ou relance) le processus de la stratégie."""
+        self.connection, child = Pipe()
+        self.process = Process(
+            target=_serve,
+            args=(
+                self.constructor,
+                self.arena.snapshot.size,
+                self.arena.snapshot.name,
+                child,
+            ),
+            daemon=True,
+        )
+        self.process.start()
+        child.close()
+
+    def stop(self):
+        """Arrête le processus de la stratégie."""
+        if self.process is None:
+            return
+        try:
+            self.connection.send(("stop",))
+            self.process.join(1)
+        except (BrokenPipeError, OSError):
+            pass
+        if self.process.is_alive():
+            self.process.terminate()
+            self.process.join()
+        self.connection.close()
+        self.process = None
+
+    def reset(self):
+        """Remplace la stratégie par une instance neuve, pour une nouvelle partie."""
+        self.overruns = []
+        try:
+            self.connection.send(("reset",))
+        except OSError:
+            # Le processus est mort entre deux parties : un neuf fait l'affaire
+            self._restart()
+
+    def next_action(self) -> Action:
+        """Demande l'action suivante au processus de la stratégie."""
+        step = self.arena.publish(self.game)
+        t = perf_counter()
+        timeout = None
+        if self.TIME_BUDGET is not None:
+            timeout = self.TIME_BUDGET + self.GRACE_PERIOD
+        try:
+            self.connection.send(("play", step, self.player_entity.color.value))
+            if not self.connection.poll(timeout):
+                # La stratégie ne répond plus, on la relance
+                self.overruns.append((self.game.t, perf_counter() - t))
+                print(f"/!\\ {self.NAME} ne répond plus, son processus est relancé")
+                self._restart()
+                return Action.WAIT
+            _, action, overrun = self.connection.recv()
+        except (EOFError, OSError):
+            # Le processus s'est arrêté : plantage, manque de mémoire, `os._exit`...
+            self.overruns.append((self.game.t, perf_counter() - t))
+            print(f"/!\\ {self.NAME} s'est arrêté, son processus est relancé")
+            self._restart()
+            return Action.WAIT
+
+        if overrun is not None:
+            self.overruns.append((self.game.t, overrun))
+        return _ACTIONS[action]
+
+    def _restart(self):
+        """Tue le processus de la stratégie s'il vit encore, et en lance un neuf."""
+        self.process.kill()
+        self.process.join()
+        self.connection.close()
+        self.start()
+
+
+class Arena:
+    """Les processus des stratégies isolées et l'état du jeu qu'ils partagent."""
+
+    def __init__(self, size: int = game.Game.DEFAULT_GRID_SIZE):
+        """Crée la mémoire partagée, les processus sont créés à la demande."""
+        self.snapshot = SharedSnapshot(size)
+        self.sandboxes: Dict[Type[Player], List[SandboxPlayer]] = {}
+        self.published: Optional[game.Game] = None
+        self.executor = ThreadPoolExecutor(game.Game.MAX_PLAYERS)
+        self.lock = Lock()
+
+    def players(
+        self, constructors: List[Optional[Type[Player]]]
+    ) -> List[Optional[SandboxPlayer]]:
+        """Renvoie des joueurs isolés pour une partie, en réutilisant les processus."""
+        available = {c: list(sandboxes) for c, sandboxes in self.sandboxes.items()}
+        players: List[Optional[SandboxPlayer]] = []
+        for constructor in constructors:
+            if constructor is None:
+                players.append(None)
+            elif available.get(constructor):
+                player = available[constructor].pop()
+                player.reset()
+                players.append(player)
+            else:
+                player = SandboxPlayer(self, constructor)
+                self.sandboxes.setdefault(constructor, []).append(player)
+                players.append(player)
+        return players
+
+    def publish(self, g: game.Game) -> int:
+        """Écrit l'état de la partie, une seule fois par étape, et renvoie l'étape."""
+        # Les joueurs qui décident au même instant partagent la même copie du jeu
+        with self.lock:
+            if self.published is not g:
+                self.snapshot.write(g)
+                self.published = g
+            return self.snapshot.step
+
+    def close(self):
+        """Arrête tous les processus et libère la mémoire partagée."""
+        for sandboxes in self.sandboxes.values():
+            for sandbox in sandboxes:
+                sandbox.stop()
+        self.sandboxes = {}
+        self.executor.shutdown()
+        self.snapshot.close(unlink=True)
+
+    def __enter__(self) -> Arena:
+        """Utilisation avec `with`."""
+        return self
+
+    def __exit__(self, *args):
+        """Libère les ressources à la sortie du bloc `with`."""
+        self.close()
+
+
+if __name__ == "__main__":
+    import os
+
+    import players
+
+    os.chdir(os.path.dirname(os.path.abspath(__file__)))
+
+    # Mesure du surcoût d'une décision isolée par rapport à une décision directe
+    g = game.Game([Player() for _ in range(game.Game.MAX_PLAYERS)], seed=1)
+    g.update(10)
+    with Arena() as arena:
+        for constructor in players.list_player_constructors():
+            direct = constructor()
+            (sandboxed,) = arena.players([constructor])
+            for player in (direct, sandboxed):
+                player.game = g
+                player.player_entity = g.player_entities[0]
+            timings = []
+            for player in (direct, sandboxed):
+                t = perf_counter()
+                for i in range(100):
+                    # Une nouvelle étape à chaque décision
+                    arena.published = None
+                    player.next_action()
+                timings.append((perf_counter() - t) / 100)
+            print(
+                f"{constructor.NAME:24} direct {timings[0] * 1000:6.3f} ms"
+                f"   isolé {timings[1] * 1000:6.3f} ms"
+                f"   surcoût {(timings[1] - timings[0]) * 1000:6.3f} ms"
+            )
@@ -0,0 +1,205 @@
+"""
+Enregistrement des résultats des tournois dans une base SQLite.
+
+Chaque partie terminée est enregistrée dès qu'elle arrive, avec les joueurs, la
+graine, la permutation, le vainqueur, les pièces, le replay et la durée de calcul.
+Un tournoi interrompu reprend donc là où il s'était arrêté : les parties déjà
+stockées ne sont pas rejouées.
+
+Les résultats sont indexés par l'empreinte des joueurs : le hachage du code source
+du module de chaque stratégie, et celui des modules du moteur. Modifier une
+stratégie ne fait rejouer que les parties où elle apparaît, et modifier le moteur
+les fait toutes rejouer.
+
+    with ResultStore() as store:
+        store.add(lineup, seed, permutation, result, duration)
+        results = store.results(lineup, jobs)
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import pickle
+import sqlite3
+import sys
+from datetime import datetime
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple, Type
+
+from game import Player
+from tournament import Job, Result
+
+DEFAULT_PATH = "results.sqlite"
+
+# Les modules dont dépend le déroulement d'une partie, y compris le traitement des
+# dépassements de temps et le cache des décisions
+ENGINE_MODULES = ("game.py", "entities.py", "gamegrid.py", "deadline.py", "zobrist.py")
+
+
+@lru_cache(maxsize=None)
+def source_fingerprint(path: str) -> str:
+    """
+    Renvoie le hachage du fichier source `path`.
+
+    Il est calculé une seule fois par processus : c'est le code chargé au
+    démarrage qui joue les parties, même si le fichier change ensuite.
+    """
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def strategy_fingerprint(cls: Type[Player]) -> str:
+    """Empreinte de la stratégie `cls` : son nom et le code de son module."""
+    path = sys.modules[cls.__module__].__file__
+    return f"{cls.__qualname__}:{source_fingerprint(os.path.abspath(path))}"
+
+
+def engine_fingerprint() -> str:
+    """Empreinte du moteur de jeu."""
+    directory = os.path.dirname(os.path.abspath(__file__))
+    return ":".join(
+        source_fingerprint(os.path.join(directory, module)) for module in ENGINE_MODULES
+    )
+
+
+def lineup_names(lineup: List[Optional[Type[Player]]]) -> str:
+    """Les classes des joueurs d'une composition, dans l'ordre, lisibles."""
+    return json.dumps(
+        [
+            None if cls is None else f"{cls.__module__}.{cls.__qualname__}"
+            for cls in lineup
+        ]
+    )
+
+
+def lineup_key(lineup: List[Optional[Type[Player]]]) -> str:
+    """Identifie une composition par l'empreinte de ses joueurs et du moteur."""
+    fingerprints = [
+        None if cls is None else strategy_fingerprint(cls) for cls in lineup
+    ]
+    key = json.dumps([fingerprints, engine_fingerprint()])
+    return hashlib.sha256(key.encode()).hexdigest()
+
+
+class ResultStore:
+    """Une base de résultats, indexée par empreinte, graine et permutation."""
+
+    # À incrémenter quand le schéma change : les résultats d'une version antérieure
+    # sont oubliés, et une base d'une version postérieure est refusée
+    VERSION = 1
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS games (
+            key TEXT NOT NULL,
+            lineup TEXT NOT NULL,
+            seed INTEGER NOT NULL,
+            permutation INTEGER NOT NULL,
+            winner INTEGER NOT NULL,
+            coins TEXT NOT NULL,
+            replay BLOB NOT NULL,
+            duration REAL NOT NULL,
+            played_at TEXT NOT NULL,
+            PRIMARY KEY (key, seed, permutation)
+        )
+    """
+
+    def __init__(self, path: str = DEFAULT_PATH):
+        """Ouvre la base `path`, et la crée si besoin."""
+        self.connection = sqlite3.connect(path)
+        (version,) = self.connection.execute("PRAGMA user_version").fetchone()
+        if version > self.VERSION:
+            self.connection.close()
+            raise RuntimeError(
+                f"La base {path} vient d'une version plus récente (schéma"
+                f" {version}, {self.VERSION} attendu) : elle n'est pas modifiée."
+            )
+        # Un arrêt brutal ne doit pas corrompre la base
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        with self.connection:
+            if version < self.VERSION:
+                self.connection.execute("DROP TABLE IF EXISTS games")
+                self.connection.execute(f"PRAGMA user_version = {self.VERSION}")
+            self.connection.execute(self.SCHEMA)
+
+    def add(
+        self,
+        lineup: List[Optional[Type[Player]]],
+        seed: int,
+        permutation: int,
+        result: Result,
+        duration: float,
+    ):
+        """Enregistre le résultat d'une partie, immédiatement."""
+        winner, coins, replay = result
+        with self.connection:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO games VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    lineup_key(lineup),
+                    lineup_names(lineup),
+                    seed,
+                    permutation,
+                    winner,
+                    json.dumps(coins),
+                    pickle.dumps(replay),
+                    duration,
+                    datetime.now().isoformat(timespec="seconds"),
+                ),
+            )
+
+    def results(
+        self, lineup: List[Optional[Type[Player]]], jobs: List[Job]
+    ) -> Dict[Job, Result]:
+        """Renvoie les résultats déjà enregistrés parmi les parties `jobs`."""
+        wanted = set(jobs)
+        found: Dict[Job, Result] = {}
+        for seed, permutation, winner, coins, replay in self.connection.execute(
+            "SELECT seed, permutation, winner, coins, replay FROM games"
+            " WHERE key = ?",
+            (lineup_key(lineup),),
+        ):
+            if (seed, permutation) in wanted:
+                found[seed, permutation] = (
+                    winner,
+                    json.loads(coins),
+                    pickle.loads(replay),
+                )
+        return found
+
+    def durations(self) -> List[Tuple[List[Optional[str]], float]]:
+        """Renvoie les classes des joueurs et la durée de chaque partie enregistrée."""
+        return [
+            (json.loads(lineup), duration)
+            for lineup, duration in self.connection.execute(
+                "SELECT lineup, duration FROM games"
+            )
+        ]
+
+    def __len__(self) -> int:
+        """Nombre de parties enregistrées."""
+        return self.connection.execute("SELECT COUNT(*) FROM games").fetchone()[0]
+
+    def close(self):
+        """Ferme la base."""
+        self.connection.close()
+
+    def __enter__(self) -> ResultStore:
+        """Utilisation avec `with`."""
+        return self
+
+    def __exit__(self, *exc):
+        """Ferme la base en sortant du bloc `with`."""
+        self.close()
+
+
+if __name__ == "__main__":
+    os.chdir(os.path.dirname(os.path.abspath(__file__)))
+
+    # Résumé des compositions enregistrées
+    with ResultStore() as store:
+        for lineup, games, duration in store.connection.execute(
+            "SELECT lineup, COUNT(*), SUM(duration) FROM games GROUP BY key"
+        ):
+            names = [name or "-" for name in json.loads(lineup)]
+            print(f"{games:5} parties  {duration:8.1f} s  {', '.join(names)}")
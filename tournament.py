@@ -0,0 +1,264 @@
+"""
+Les parties d'un tournoi, jouées sans interface.
+
+`play_one_game` joue une partie seule. `play_games` entrelace plusieurs parties
+dans le même processus : les décisions en attente de toutes les parties sont
+rassemblées, et chaque stratégie `BATCHED` les reçoit en un seul appel à
+`play_batch`.
+
+Les parties d'un tournoi sont identifiées par leur graine et leur permutation,
+voir `tournament_jobs` : elles sont reproductibles, et peuvent être enregistrées
+puis reprises avec `store.ResultStore`. `paired_jobs` joue au contraire chaque
+carte depuis tous les points de départ qui ne se déduisent pas l'un de l'autre par
+une symétrie de la carte : la chance d'une carte est la même pour tous.
+"""
+
+from __future__ import annotations
+
+from math import log
+from time import perf_counter
+from typing import Callable, Dict, List, Optional, Tuple, Type
+
+import game
+from game import Action, Player
+from gamegrid import Grid, Tile
+
+# Le résultat d'une partie : indice du vainqueur (-1 si match nul), pièces des
+# joueurs et replay
+Result = Tuple[int, List[int], tuple]
+# Une partie à jouer : graine de la carte et permutation des points de départ
+Job = Tuple[int, int]
+# Une partie jouée : la partie, son résultat et sa durée de calcul en secondes
+Outcome = Tuple[Job, Result, float]
+# Les décisions d'une stratégie `BATCHED` : indice de la partie, couleur et copie
+Batch = List[Tuple[int, Tile, game.Game]]
+# Une transformation du plateau : `(x, y, size)` vers les nouvelles coordonnées
+Transformation = Callable[[int, int, int], Tuple[int, int]]
+
+# Les huit transformations du carré, qui échangent ses coins entre eux
+TRANSFORMATIONS: List[Transformation] = [
+    lambda x, y, s: (x, y),
+    lambda x, y, s: (s - 1 - y, x),
+    lambda x, y, s: (s - 1 - x, s - 1 - y),
+    lambda x, y, s: (y, s - 1 - x),
+    lambda x, y, s: (s - 1 - x, y),
+    lambda x, y, s: (x, s - 1 - y),
+    lambda x, y, s: (y, x),
+    lambda x, y, s: (s - 1 - y, s - 1 - x),
+]
+
+# `Game.starting_positions` ne donne que 12 permutations différentes, ensuite
+# elles se répètent
+PERMUTATIONS = 12
+
+
+def tournament_job(i: int) -> Job:
+    """La partie `i` d'un tournoi : graine `i` et permutation `i`."""
+    return i, i
+
+
+def tournament_jobs(n: int) -> List[Job]:
+    """Les `n` parties d'un tournoi, toujours les mêmes pour une composition."""
+    return [tournament_job(i) for i in range(n)]
+
+
+def map_symmetries(
+    seed: int, size: int = game.Game.DEFAULT_GRID_SIZE
+) -> List[Transformation]:
+    """Les transformations qui laissent la carte de graine `seed` inchangée."""
+    grid = Grid(size, seed).grid
+    cells = [(x, y) for y in range(size) for x in range(size)]
+    symmetries = []
+    for transformation in TRANSFORMATIONS:
+        images = (transformation(x, y, size) for x, y in cells)
+        if all(grid[v][u] == grid[y][x] for (x, y), (u, v) in zip(cells, images)):
+            symmetries.append(transformation)
+    return symmetries
+
+
+def distinct_permutations(
+    seed: int, players: int, size: int = game.Game.DEFAULT_GRID_SIZE
+) -> List[int]:
+    """
+    Les permutations qui placent différemment `players` joueurs sur la carte `seed`.
+
+    Deux permutations sont équivalentes si une symétrie de la carte envoie les
+    points de départ de l'une sur ceux de l'autre : la partie commence de la même
+    façon, à une rotation ou une réflexion près. Seule la première de chaque
+    classe est gardée.
+    """
+    symmetries = map_symmetries(seed, size)
+    seen = set()
+    permutations = []
+    for permutation in range(PERMUTATIONS):
+        coords = game.Game.starting_positions(size, permutation)[:players]
+        # La même clé pour toutes les permutations équivalentes
+        canonical = min(
+            tuple(transformation(x, y, size) for x, y in coords)
+            for transformation in symmetries
+        )
+        if canonical not in seen:
+            seen.add(canonical)
+            permutations.append(permutation)
+    return permutations
+
+
+def paired_jobs(seeds: int, players: int) -> List[Job]:
+    """
+    Les parties d'un tournoi apparié sur `seeds` cartes, pour `players` joueurs.
+
+    Chaque carte est jouée depuis tous ses départs différents : les cartes ayant
+    4 symétries, cela fait 3 parties par carte à 2 joueurs et 5 à 3 ou 4.
+    """
+    return [
+        (seed, permutation)
+        for seed in range(seeds)
+        for permutation in distinct_permutations(seed, players)
+    ]
+
+
+def balanced_jobs(n: int, players: int) -> List[Job]:
+    """
+    Les `n` premières parties de `paired_jobs` pour `players` joueurs.
+
+    Les cartes se suivent, chacune depuis tous ses départs différents : chaque
+    joueur change de point de départ d'une partie à l'autre, au lieu d'en avoir
+    un seul lié à la graine.
+    """
+    jobs: List[Job] = []
+    seed = 0
+    while len(jobs) < n:
+        jobs += [(seed, p) for p in distinct_permutations(seed, players)]
+        seed += 1
+    return jobs[:n]
+
+
+def leader_decided(
+    wins: List[int], confidence: float = 0.95, margin: float = 0.2
+) -> bool:
+    """
+    Renvoie vrai si le joueur en tête est meilleur que le deuxième.
+
+    C'est un test séquentiel du rapport des probabilités (SPRT) sur les parties
+    gagnées par l'un des deux : la part du premier vaut-elle 1/2, ou 1/2 + `margin` ?
+    Le test peut être refait après chaque partie, le risque de se tromper reste
+    inférieur à `1 - confidence`.
+    """
+    if len(wins) < 2:
+        return True
+    first, second = sorted(wins, reverse=True)[:2]
+    share = 0.5 + margin
+    ratio = first * log(2 * share) + second * log(2 * (1 - share))
+    return ratio >= log(confidence / (1 - confidence))
+
+
+def game_result(g: game.Game, players: List[Optional[Player]]) -> Result:
+    """Renvoie l'indice du vainqueur, les pièces des joueurs et le replay."""
+    coins = [player.coins if player is not None else 0 for player in players]
+    if g.winner is not None:
+        return players.index(g.winner), coins, g.replay()
+    return -1, coins, g.replay()
+
+
+def play_one_game(args: Tuple[int, List[Optional[Type[Player]]]]) -> Result:
+    """Fonction parallélisable qui joue une partie."""
+    i, player_constructors = args
+    players = [cls() if cls is not None else None for cls in player_constructors]
+
+    # On joue une partie jusqu'au bout
+    g = game.Game(players, permutation=i)
+    g.update(float(g.MAX_DURATION))
+    return game_result(g, players)
+
+
+def _collect_decisions(
+    games: List[game.Game],
+    pending: Dict[int, Dict[Tile, game.Game]],
+    batchers: Dict[type, Player],
+) -> Tuple[Dict[int, Dict[Tile, Action]], Dict[type, Batch]]:
+    """
+    Fait décider les stratégies ordinaires, et regroupe les autres par stratégie.
+
+    Renvoie les actions déjà choisies, et pour chaque stratégie `BATCHED` les
+    décisions qu'elle doit prendre : partie, couleur et copie de la partie.
+    """
+    actions: Dict[int, Dict[Tile, Action]] = {j: {} for j in pending}
+    batches: Dict[type, Batch] = {cls: [] for cls in batchers}
+    for j, states in pending.items():
+        for color, clone in states.items():
+            player = games[j].players[color]
+            player.game = clone
+            player.player_entity = clone.player_entity_from_color(color)
+            if type(player) in batchers:
+                batches[type(player)].append((j, color, clone))
+            else:
+                actions[j][color] = player.next_action()
+    return actions, batches
+
+
+def _decide_batches(
+    batchers: Dict[type, Player],
+    batches: Dict[type, Batch],
+    actions: Dict[int, Dict[Tile, Action]],
+):
+    """Fait décider chaque stratégie `BATCHED` pour tout son lot, en un appel."""
+    for cls, batch in batches.items():
+        if len(batch) == 0:
+            continue
+        decisions = batchers[cls].next_actions(
+            [
+                (clone, clone.player_entity_from_color(color))
+                for _, color, clone in batch
+            ]
+        )
+        for (j, color, _), action in zip(batch, decisions):
+            actions[j][color] = action
+
+
+def play_games(args: Tuple[List[Job], List[Optional[Type[Player]]]]) -> List[Outcome]:
+    """
+    Fonction parallélisable qui joue plusieurs parties entrelacées.
+
+    Les parties étant calculées ensemble, chacune reçoit comme durée la moyenne du
+    lot.
+    """
+    jobs, player_constructors = args
+    start = perf_counter()
+    lineups = [
+        [cls() if cls is not None else None for cls in player_constructors]
+        for _ in jobs
+    ]
+    games = [
+        game.Game(players, seed, permutation)
+        for players, (seed, permutation) in zip(lineups, jobs)
+    ]
+
+    # Une seule instance par stratégie `BATCHED` décide pour toutes les parties
+    batchers: Dict[type, Player] = {
+        cls: cls()
+        for cls in set(player_constructors)
+        if cls is not None and cls.BATCHED
+    }
+
+    running = list(range(len(games)))
+    while len(running) > 0:
+        # Chaque partie avance jusqu'à sa prochaine décision
+        pending: Dict[int, Dict[Tile, game.Game]] = {}
+        for j in running:
+            states = games[j].step_until_decision(game.Game.MAX_DURATION)
+            if len(states) > 0:
+                pending[j] = states
+        running = list(pending)
+
+        # Les décisions sont regroupées par stratégie
+        actions, batches = _collect_decisions(games, pending, batchers)
+        _decide_batches(batchers, batches, actions)
+
+        for j in pending:
+            games[j].submit_actions(actions[j])
+
+    duration = (perf_counter() - start) / max(len(jobs), 1)
+    return [
+        (job, game_result(g, players), duration)
+        for job, g, players in zip(jobs, games, lineups)
+    ]
@@ -0,0 +1,625 @@
+"""
+Un environnement vectorisé, qui fait avancer de nombreuses parties à la fois.
+
+Les parties sont stockées colonne par colonne dans des tableaux NumPy (un tableau
+pour les abscisses de tous les joueurs de toutes les parties, un autre pour leurs
+vitesses...), et chaque étape fait avancer toutes les parties en même temps, avec
+les mêmes règles que `game.Game` :
+
+    env = VecEnv(256, seed=1)
+    observations = env.reset()
+    while True:
+        actions = choose(observations, env.due)
+        observations, rewards, dones, due = env.step(actions)
+
+Le temps est compté en ticks entiers plutôt qu'en fractions : avec 840 ticks par
+seconde, toutes les vitesses jusqu'à 2 actions par seconde tombent exactement sur
+des ticks. Les rares évènements qui ne tombent pas sur un tick (changement de
+vitesse au milieu d'une action, vitesse très élevée) sont arrondis au tick suivant.
+"""
+
+from __future__ import annotations
+
+import sys
+from random import Random
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from game import Action, Game
+from gamegrid import Grid, Tile
+
+# Les actions, dans l'ordre des indices utilisés par l'environnement
+ACTIONS: List[Action] = list(Action)
+
+_WAIT = ACTIONS.index(Action.WAIT)
+_DX = np.array([action.apply((0, 0))[0] for action in ACTIONS])
+_DY = np.array([action.apply((0, 0))[1] for action in ACTIONS])
+_IS_MOVEMENT = np.array([action.is_movement() for action in ACTIONS])
+_IS_ATTACK = np.array([action.is_attack() for action in ACTIONS])
+_SWAP = np.array([ACTIONS.index(action.swap()) for action in ACTIONS])
+_TO_MOVEMENT = np.array([ACTIONS.index(action.to_movement()) for action in ACTIONS])
+_DIRECTIONS = [
+    ACTIONS.index(action)
+    for action in (
+        Action.MOVE_UP,
+        Action.MOVE_DOWN,
+        Action.MOVE_LEFT,
+        Action.MOVE_RIGHT,
+    )
+]
+
+# Tables indexées par les valeurs des tuiles, plus rapides que `np.isin`
+_IS_BONUS = np.zeros(max(Tile) + 1, bool)
+_IS_BONUS[[tile for tile in Tile if tile.is_bonus()]] = True
+_IS_FLOOR = np.zeros(max(Tile) + 1, bool)
+_IS_FLOOR[[tile for tile in Tile if tile.is_floor()]] = True
+
+
+class VecEnv:
+    """`n` parties à 4 joueurs, jouées en parallèle."""
+
+    # Nombre de ticks par seconde
+    TICKS = 840
+    # Progression d'une action complète : un joueur de vitesse `k / 4` avance de
+    # `k` unités par tick
+    FULL = 4 * TICKS
+    HALF = 2 * TICKS
+
+    INITIAL_SPEED = 4
+    FIREBALL_SPEED = 16
+    # Nombre initial d'emplacements de boules de feu par partie, agrandi au besoin
+    FIREBALLS = 16
+
+    def __init__(
+        self, n: int, seed: Optional[int] = None, size: int = Game.DEFAULT_GRID_SIZE
+    ):
+        """Crée `n` parties, dont les cartes sont tirées à partir de `seed`."""
+        self.n = n
+        self.size = size
+        self.random = Random(seed)
+
+        # Les cartes, et le générateur aléatoire de chaque partie
+        self.background = np.zeros((n, size, size), np.int8)
+        self.items = np.zeros((n, size, size), np.int8)
+        self.grids: List[Optional[Grid]] = [None] * n
+        self.permutations = np.zeros(n, np.int64)
+
+        # Les joueurs, une colonne par couleur
+        self.alive = np.zeros((n, 4), bool)
+        self.x = np.zeros((n, 4), np.int64)
+        self.y = np.zeros((n, 4), np.int64)
+        self.action = np.zeros((n, 4), np.int64)
+        self.progress = np.zeros((n, 4), np.int64)
+        self.speed = np.zeros((n, 4), np.int64)
+        self.shield = np.zeros((n, 4), bool)
+        self.coins = np.zeros((n, 4), np.int64)
+        self.super_fireballs = np.zeros((n, 4), np.int64)
+
+        # Les boules de feu, dans des emplacements réutilisés
+        self.fireball_alive = np.zeros((n, self.FIREBALLS), bool)
+        self.fireball_x = np.zeros((n, self.FIREBALLS), np.int64)
+        self.fireball_y = np.zeros((n, self.FIREBALLS), np.int64)
+        self.fireball_action = np.zeros((n, self.FIREBALLS), np.int64)
+        self.fireball_progress = np.zeros((n, self.FIREBALLS), np.int64)
+        self.fireball_sender = np.zeros((n, self.FIREBALLS), np.int64)
+        # Les boules de feu lancées pendant l'étape en cours ne bougent pas encore
+        self._born = np.zeros((n, self.FIREBALLS), bool)
+
+        # L'état des parties
+        self.t = np.zeros(n, np.int64)
+        self.dt = np.zeros(n, np.int64)
+        self.due = np.zeros((n, 4), bool)
+        self.over = np.zeros(n, bool)
+        self.winner = np.full(n, -1, np.int64)
+        # Durée de la dernière partie terminée, en ticks
+        self.final_t = np.zeros(n, np.int64)
+
+        self._rings = self._lava_rings()
+        self._coords = [(x, y) for x in range(1, size - 1) for y in range(1, size - 1)]
+
+    def reset(self) -> np.ndarray:
+        """Commence une nouvelle partie partout, et renvoie les observations."""
+        for i in range(self.n):
+            self._new_game(i)
+        self._advance(np.arange(self.n))
+        return self.observations()
+
+    def step(
+        self, actions: np.ndarray
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Joue les actions des joueurs qui doivent décider, de forme `(n, 4)`.
+
+        Les actions sont des indices de `ACTIONS`, seules celles des joueurs de
+        `due` sont lues. Toutes les parties avancent jusqu'à la prochaine décision,
+        et les parties terminées recommencent sur une nouvelle carte. Renvoie les
+        observations, les récompenses (+1 pour le vainqueur, -1 pour un joueur
+        éliminé), les parties terminées et les joueurs qui doivent décider.
+        """
+        actions = np.asarray(actions, np.int64)
+        games = np.flatnonzero(self.due.any(axis=1))
+        alive = self.alive.copy()
+
+        self._update_entities(games, self.dt[games], actions[games])
+        self._advance(games)
+
+        rewards = np.zeros((self.n, 4), np.float32)
+        rewards[alive & ~self.alive] = -1
+        dones = self.over.copy()
+        finished = np.flatnonzero(dones)
+        won = finished[self.winner[finished] >= 0]
+        rewards[won, self.winner[won]] = 1
+
+        self.final_t[finished] = self.t[finished]
+        for i in finished:
+            self._new_game(i)
+        self._advance(finished)
+
+        return self.observations(), rewards, dones, self.due.copy()
+
+    def observations(self) -> np.ndarray:
+        """Les grilles des parties, comme `Game.tile_grid`, de forme `(n, S, S)`."""
+        tiles = np.maximum(self.background, self.items)
+        games, colors = np.nonzero(self.alive)
+        tiles[games, self.y[games, colors], self.x[games, colors]] = (
+            Tile.PLAYER_RED + colors
+        )
+        games, slots = np.nonzero(self.fireball_alive)
+        tiles[games, self.fireball_y[games, slots], self.fireball_x[games, slots]] = (
+            Tile.FIREBALL
+        )
+        return tiles
+
+    def action_mask(self) -> np.ndarray:
+        """Les actions valides de chaque joueur, de forme `(n, 4, len(ACTIONS))`."""
+        games = np.arange(self.n)
+        mask = np.zeros((self.n, 4, len(ACTIONS)), bool)
+        for color in range(4):
+            for i in range(len(ACTIONS)):
+                actions = np.full(self.n, i)
+                mask[:, color, i] = self.alive[:, color] & self._is_action_valid(
+                    games, color, actions
+                )
+        return mask
+
+    def _new_game(self, i: int):
+        """Remplace la partie `i` par une nouvelle partie."""
+        grid = Grid(self.size, self.random.randrange(sys.maxsize))
+        self.grids[i] = grid
+        self.permutations[i] = self.random.randrange(24)
+
+        tiles = np.array(grid.grid, np.int8)
+        collectibles = np.isin(tiles, [tile for tile in Tile if tile.is_collectible()])
+        self.items[i] = np.where(collectibles, tiles, 0)
+        self.background[i] = np.where(collectibles, Tile.FLOOR, tiles)
+
+        coords = Game.starting_positions(self.size, self.permutations[i])
+        self.x[i], self.y[i] = np.array(coords).T
+        self.alive[i] = True
+        self.action[i] = _WAIT
+        self.progress[i] = 0
+        self.speed[i] = self.INITIAL_SPEED
+        self.shield[i] = False
+        self.coins[i] = 0
+        self.super_fireballs[i] = 0
+        self.fireball_alive[i] = False
+
+        self.t[i] = 0
+        self.dt[i] = 0
+        self.due[i] = False
+        self.over[i] = False
+        self.winner[i] = -1
+
+    def _advance(self, games: np.ndarray):
+        """Avance les parties `games` jusqu'à ce qu'un joueur doive décider."""
+        games = games[~self.over[games]]
+        while len(games) > 0:
+            dt = self._next_dt(games)
+
+            # Mise à jour du terrain
+            self._add_lava(games, dt)
+            self._add_collectibles(games)
+
+            self.t[games] += dt
+
+            # Les parties où un joueur doit décider s'arrêtent là
+            progress = self.progress[games]
+            self.due[games] = (
+                self.alive[games]
+                & (progress < self.FULL)
+                & (progress + dt[:, None] * self.speed[games] >= self.FULL)
+            )
+            waiting = self.due[games].any(axis=1)
+            self.dt[games[waiting]] = dt[waiting]
+
+            games, dt = games[~waiting], dt[~waiting]
+            self._update_entities(games, dt, np.zeros((len(games), 4), np.int64))
+            games = games[~self.over[games]]
+
+    def _next_dt(self, games: np.ndarray) -> np.ndarray:
+        """Nombre de ticks jusqu'à la prochaine update de chaque partie."""
+        # Jusqu'au prochain changement de case, ou à la fin de l'action
+        dt = self.TICKS - self.t[games] % self.TICKS
+        for alive, action, progress, speed in (
+            (
+                self.alive[games],
+                self.action[games],
+                self.progress[games],
+                self.speed[games],
+            ),
+            (
+                self.fireball_alive[games],
+                self.fireball_action[games],
+                self.fireball_progress[games],
+                self.FIREBALL_SPEED,
+            ),
+        ):
+            target = np.where(
+                _IS_MOVEMENT[action] & (progress < self.HALF), self.HALF, self.FULL
+            )
+            ticks = -((progress - target) // speed)
+            ticks = np.where(alive, ticks, self.FULL)
+            dt = np.minimum(dt, ticks.min(axis=1, initial=self.FULL))
+        return dt
+
+    def _lava_rings(self) -> List[np.ndarray]:
+        """Les cases de chaque anneau de lave, de l'extérieur vers le centre."""
+        rings = []
+        xs, ys = np.meshgrid(np.arange(self.size), np.arange(self.size))
+        for ring in range(self.size // 2):
+            outer = (
+                (ring <= xs)
+                & (xs < self.size - ring)
+                & (ring <= ys)
+                & (ys < self.size - ring)
+            )
+            inner = (
+                (ring < xs)
+                & (xs < self.size - ring - 1)
+                & (ring < ys)
+                & (ys < self.size - ring - 1)
+            )
+            rings.append(outer & ~inner)
+        return rings
+
+    def _add_lava(self, games: np.ndarray, dt: np.ndarray):
+        """Ajoute de la lave après un certain temps, comme `Game._add_lava`."""
+        start = int(Game.LAVA_FLOOD_START_TIME) * self.TICKS
+        duration = int(Game.LAVA_STEP_DURATION) * self.TICKS
+        t = self.t[games]
+        end = t + dt
+        flooding = (end >= start) & (t // duration < end // duration)
+
+        for i, t_end in zip(games[flooding], end[flooding]):
+            # Étape de l'inondation
+            step = (t_end - start) // duration
+            ring = 1 + step // 2
+            if ring >= self.size // 2:
+                continue
+            background = self.background[i]
+            if step % 2 == 1:
+                cells = self._rings[ring] & (background == Tile.DAMAGED_FLOOR)
+                background[cells] = Tile.LAVA
+                self.items[i][cells] = 0
+                self.alive[i] &= ~cells[self.y[i], self.x[i]]
+            else:
+                cells = self._rings[ring] & (background == Tile.FLOOR)
+                background[cells] = Tile.DAMAGED_FLOOR
+
+    def _add_collectibles(self, games: np.ndarray):
+        """Ajoute des objets s'il n'y en a plus, comme `Game._add_collectibles`."""
+        items = self.items[games]
+        bonuses = _IS_BONUS[items].sum(axis=(1, 2))
+
+        for i in games[bonuses <= 1]:
+            coins = np.count_nonzero(self.items[i] == Tile.COIN)
+            penalties = np.count_nonzero(self.items[i] == Tile.SPEEDPENALTY)
+            c = [Tile.SPEEDBOOST, Tile.SUPER_FIREBALL, Tile.COIN]
+            if coins < penalties:
+                c = [Tile.SPEEDBOOST, Tile.SHIELD, Tile.COIN]
+            elif coins > penalties:
+                c = [Tile.SPEEDBOOST, Tile.SUPER_FIREBALL, Tile.SPEEDPENALTY]
+
+            # Les cases libres, sans objet, joueur ni boule de feu
+            free = _IS_FLOOR[self.background[i]] & (self.items[i] == 0)
+            free[self.y[i][self.alive[i]], self.x[i][self.alive[i]]] = False
+            fireballs = self.fireball_alive[i]
+            free[self.fireball_y[i][fireballs], self.fireball_x[i][fireballs]] = False
+
+            # Le même tirage que dans `Game`, pour retrouver les mêmes cartes
+            coords = self._coords[:]
+            self.grids[i].random.shuffle(coords)
+            while len(coords) > 0:
+                x, y = coords.pop()
+                if free[y, x]:
+                    self.items[i, y, x] = c.pop()
+                if len(c) == 0:
+                    break
+
+    def _update_entities(self, games: np.ndarray, dt: np.ndarray, actions: np.ndarray):
+        """Met à jour les entités, et regarde si les parties sont finies."""
+        if len(games) == 0:
+            return
+        self._born[games] = False
+
+        # Les joueurs dans l'ordre des couleurs, puis les boules de feu
+        for color in range(4):
+            self._update_players(games, color, dt, actions[:, color])
+        self._update_fireballs(games, dt)
+
+        # Il ne reste qu'un joueur en vie ?
+        alive = self.alive[games]
+        remaining = alive.sum(axis=1)
+        self.over[games] = (remaining <= 1) | (
+            self.t[games] >= int(Game.MAX_DURATION) * self.TICKS
+        )
+        won = remaining == 1
+        self.winner[games[won]] = alive[won].argmax(axis=1)
+
+    def _update_players(
+        self, games: np.ndarray, color: int, dt: np.ndarray, actions: np.ndarray
+    ):
+        """Met à jour le joueur `color` des parties `games`."""
+        progress = self.progress[games, color]
+        step = dt * self.speed[games, color]
+        alive = self.alive[games, color]
+
+        # Fin d'une action, choix de la prochaine action
+        over = alive & (progress < self.FULL) & (progress + step >= self.FULL)
+        if over.any():
+            g = games[over]
+            action = actions[over]
+            action = np.where(self._is_action_valid(g, color, action), action, _WAIT)
+            self.action[g, color] = action
+            self.progress[g, color] = 0
+            attack = _IS_ATTACK[action]
+            self._attack(g[attack], color, action[attack])
+
+        # À la moitié du déplacement on met à jour les coordonnées du joueur
+        action = self.action[games, color]
+        half = (
+            alive
+            & ~over
+            & _IS_MOVEMENT[action]
+            & (progress < self.HALF)
+            & (progress + step >= self.HALF)
+        )
+        if half.any():
+            g = games[half]
+            action = action[half]
+            self.progress[g, color] = self.HALF
+            x = self.x[g, color] + _DX[action]
+            y = self.y[g, color] + _DY[action]
+
+            # Si le déplacement est toujours valide, il est effectué, sinon on fait
+            # demi-tour
+            valid = self._can_move(g, x, y)
+            self.action[g[~valid], color] = _SWAP[action[~valid]]
+            g, x, y = g[valid], x[valid], y[valid]
+            self.x[g, color] = x
+            self.y[g, color] = y
+
+            lava = self.background[g, y, x] == Tile.LAVA
+            self.alive[g[lava], color] = False
+            self._enter(g[~lava], color)
+
+        # Rien de spécial, on avance dans l'action
+        rest = alive & ~over & ~half
+        self.progress[games[rest], color] += step[rest]
+
+    def _enter(self, games: np.ndarray, color: int):
+        """Le joueur `color` arrive sur une case : boules de feu et objets."""
+        x = self.x[games, color]
+        y = self.y[games, color]
+
+        # Suppression du joueur s'il est transpercé par une boule de feu
+        hits = (
+            self.fireball_alive[games]
+            & (self.fireball_x[games] == x[:, None])
+            & (self.fireball_y[games] == y[:, None])
+        )
+        self._hit(games, color, hits)
+
+        # Un objet à ramasser ?
+        item = self.items[games, y, x]
+        self.items[games, y, x] = 0
+        self.coins[games, color] += item == Tile.COIN
+        self.speed[games, color] += item == Tile.SPEEDBOOST
+        penalty = (item == Tile.SPEEDPENALTY) & (self.speed[games, color] >= 3)
+        self.speed[games, color] -= penalty
+        self.super_fireballs[games, color] += item == Tile.SUPER_FIREBALL
+        self.shield[games, color] |= item == Tile.SHIELD
+
+    def _hit(self, games: np.ndarray, color: int, hits: np.ndarray):
+        """Le joueur `color` est touché par les boules de feu `hits`."""
+        count = hits.sum(axis=1)
+        shield = self.shield[games, color]
+
+        # Le bouclier arrête une boule de feu, qui disparaît
+        absorbed = shield & (count > 0)
+        g = games[absorbed]
+        self.shield[g, color] = False
+        self.fireball_alive[g, hits[absorbed].argmax(axis=1)] = False
+
+        dead = (count > 0) & (~shield | (count > 1))
+        self.alive[games[dead], color] = False
+
+    def _update_fireballs(self, games: np.ndarray, dt: np.ndarray):
+        """Met à jour les boules de feu des parties `games`."""
+        alive = self.fireball_alive[games] & ~self._born[games]
+        progress = self.fireball_progress[games]
+        step = dt[:, None] * self.FIREBALL_SPEED
+
+        over = alive & (progress < self.FULL) & (progress + step >= self.FULL)
+        half = alive & ~over & (progress < self.HALF) & (progress + step >= self.HALF)
+        rest = alive & ~over & ~half
+        progress = np.where(rest, progress + step, progress)
+        progress[over] = 0
+        progress[half] = self.HALF
+        self.fireball_progress[games] = progress
+
+        if not half.any():
+            return
+
+        # La boule de feu vient de changer de coordonnées
+        action = self.fireball_action[games]
+        x = self.fireball_x[games] + _DX[action] * half
+        y = self.fireball_y[games] + _DY[action] * half
+        self.fireball_x[games] = x
+        self.fireball_y[games] = y
+
+        # Suppression de la boule de feu si elle tape un mur
+        wall = half & (self.background[games[:, None], y, x] == Tile.WALL)
+        self.fireball_alive[games] &= ~wall
+
+        # Suppression des joueurs transpercés par la boule de feu
+        for color in range(4):
+            hits = (
+                half
+                & ~wall
+                & self.alive[games, color][:, None]
+                & (x == self.x[games, color][:, None])
+                & (y == self.y[games, color][:, None])
+            )
+            touched = hits.any(axis=1)
+            self._hit(games[touched], color, hits[touched])
+
+    def _can_move(self, games: np.ndarray, x: np.ndarray, y: np.ndarray) -> np.ndarray:
+        """Renvoie vrai si la case `(x, y)` n'a ni mur ni joueur."""
+        players = (
+            self.alive[games]
+            & (self.x[games] == x[:, None])
+            & (self.y[games] == y[:, None])
+        )
+        return (self.background[games, y, x] != Tile.WALL) & ~players.any(axis=1)
+
+    def _is_action_valid(
+        self, games: np.ndarray, color: int, actions: np.ndarray
+    ) -> np.ndarray:
+        """Renvoie vrai pour les actions jouables, comme `Game.is_action_valid`."""
+        x = np.clip(self.x[games, color] + _DX[actions], 0, self.size - 1)
+        y = np.clip(self.y[games, color] + _DY[actions], 0, self.size - 1)
+        movement = _IS_MOVEMENT[actions] & self._can_move(games, x, y)
+
+        # Une attaque est possible si le joueur n'a pas de boule de feu en vol
+        thrown = (
+            self.fireball_alive[games] & (self.fireball_sender[games] == color)
+        ).any(axis=1)
+        attack = _IS_ATTACK[actions] & (
+            (self.super_fireballs[games, color] > 0) | ~thrown
+        )
+
+        return (actions == _WAIT) | movement | attack
+
+    def _attack(self, games: np.ndarray, color: int, actions: np.ndarray):
+        """Lance des boules de feu pour le joueur `color`."""
+        if len(games) == 0:
+            return
+        x = self.x[games, color]
+        y = self.y[games, color]
+
+        # Un sort lance une boule de feu dans toutes les directions
+        spell = self.super_fireballs[games, color] > 0
+        self.super_fireballs[games[spell], color] -= 1
+        for direction in _DIRECTIONS:
+            self._throw(games[spell], x[spell], y[spell], direction, color)
+
+        self._throw(
+            games[~spell], x[~spell], y[~spell], _TO_MOVEMENT[actions[~spell]], color
+        )
+
+    def _throw(
+        self,
+        games: np.ndarray,
+        x: np.ndarray,
+        y: np.ndarray,
+        direction: np.ndarray,
+        color: int,
+    ):
+        """Ajoute une boule de feu dans chacune des parties `games`."""
+        if len(games) == 0:
+            return
+        free = ~self.fireball_alive[games]
+        if not free.any(axis=1).all():
+            self._grow()
+            free = ~self.fireball_alive[games]
+        slot = free.argmax(axis=1)
+
+        self.fireball_alive[games, slot] = True
+        self.fireball_x[games, slot] = x
+        self.fireball_y[games, slot] = y
+        self.fireball_action[games, slot] = direction
+        self.fireball_progress[games, slot] = 0
+        self.fireball_sender[games, slot] = color
+        self._born[games, slot] = True
+
+    def _grow(self):
+        """Double le nombre d'emplacements de boules de feu."""
+        for name in (
+            "fireball_alive",
+            "fireball_x",
+            "fireball_y",
+            "fireball_action",
+            "fireball_progress",
+            "fireball_sender",
+            "_born",
+        ):
+            array = getattr(self, name)
+            setattr(self, name, np.concatenate([array, np.zeros_like(array)], axis=1))
+
+
+if __name__ == "__main__":
+    import os
+    from fractions import Fraction
+    from time import perf_counter
+
+    import game
+
+    os.chdir(os.path.dirname(os.path.abspath(__file__)))
+
+    def random_actions(env: VecEnv, rng: np.random.Generator) -> np.ndarray:
+        """Tire une action valide au hasard pour chaque joueur."""
+        mask = env.action_mask()
+        mask[..., _WAIT] = True
+        scores = rng.random(mask.shape) * mask
+        return scores.argmax(axis=2)
+
+    # Vérification des règles : les parties rejouées par `GameReplay` doivent se
+    # terminer de la même manière
+    env = VecEnv(32, seed=1)
+    env.reset()
+    rng = np.random.default_rng(1)
+    history = [[[] for _ in range(4)] for _ in range(env.n)]
+    checked = mismatches = 0
+    while checked < 64:
+        actions = random_actions(env, rng)
+        seeds = [(grid.seed, int(p)) for grid, p in zip(env.grids, env.permutations)]
+        for i, color in zip(*np.nonzero(env.due)):
+            history[i][color].append(ACTIONS[actions[i, color]])
+        _, rewards, dones, _ = env.step(actions)
+        for i in np.flatnonzero(dones):
+            replay = game.GameReplay((*seeds[i], ["Replay"] * 4, history[i]))
+            replay.update(float(replay.MAX_DURATION))
+            winner = rewards[i].argmax() if rewards[i].max() > 0 else None
+            expected = (
+                replay.t,
+                replay.winner and list(replay.players.values()).index(replay.winner),
+            )
+            if (Fraction(int(env.final_t[i]), env.TICKS), winner) != expected:
+                mismatches += 1
+            history[i] = [[] for _ in range(4)]
+            checked += 1
+    print(f"{checked - mismatches}/{checked} parties identiques à `Game`")
+
+    # Débit de l'environnement, les actions invalides sont remplacées par l'attente
+    for n in (1, 16, 256, 1024):
+        env = VecEnv(n, seed=1)
+        env.reset()
+        steps = 0
+        start = perf_counter()
+        while perf_counter() - start < 3:
+            env.step(rng.integers(len(ACTIONS), size=(n, 4)))
+            steps += n
+        rate = steps / (perf_counter() - start)
+        print(f"{n:4} parties : {rate:9.0f} décisions par seconde")
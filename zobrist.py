@@ -0,0 +1,154 @@
+"""
+Hachage de Zobrist des parties, et table de transposition.
+
+Chaque élément de l'état du jeu (une case du terrain, une entité à une position,
+les caractéristiques d'un joueur, son action en cours) reçoit une clé aléatoire
+de 64 bits, et le hachage d'une partie est le ou exclusif des clés de ses
+éléments. Le moteur le met à jour à chaque changement, en retirant l'ancienne clé
+et en ajoutant la nouvelle : `game.hash` est toujours à jour, sans parcourir la
+grille.
+
+Les clés sont tirées d'une fonction de hachage et non d'un générateur aléatoire :
+elles sont les mêmes d'un processus à l'autre. Le temps et la progression des
+actions ne sont pas pris en compte, ils changent à chaque étape.
+"""
+
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from hashlib import blake2b
+from typing import TYPE_CHECKING, Generic, Hashable, Optional, Tuple, TypeVar
+
+import entities
+from gamegrid import Tile
+
+if TYPE_CHECKING:
+    from game import Game
+
+Action = entities.Action
+
+
+@lru_cache(maxsize=None)
+def key(*parts: Hashable) -> int:
+    """Renvoie la clé de 64 bits d'un élément de l'état du jeu."""
+    digest = blake2b(repr(parts).encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "little")
+
+
+def background_key(x: int, y: int, tile: Tile) -> int:
+    """Clé de la case `(x, y)` du terrain."""
+    return key("background", x, y, int(tile))
+
+
+def entity_key(entity: entities.Entity, x: int, y: int) -> int:
+    """Clé de l'entité `entity` en `(x, y)`."""
+    if isinstance(entity, entities.Fireball):
+        # Deux boules de feu sur la même case ne vont pas forcément au même endroit
+        return key("fireball", x, y, entity.action.name, int(entity.sender))
+    return key("entity", int(entity.TILE), x, y)
+
+
+def stats_key(player: entities.PlayerEntity) -> int:
+    """Clé des caractéristiques du joueur `player`."""
+    return key(
+        "stats",
+        int(player.color),
+        player.speed,
+        player.shield,
+        player.coins,
+        player.super_fireballs,
+    )
+
+
+def action_key(player: entities.PlayerEntity, action: Action) -> int:
+    """Clé de l'action en cours du joueur `player`."""
+    return key("action", int(player.color), action.name)
+
+
+def player_key(player: entities.PlayerEntity) -> int:
+    """Clé de tout ce qui concerne le joueur `player`, sauf sa position."""
+    return stats_key(player) ^ action_key(player, player.action)
+
+
+def full_hash(game: Game) -> int:
+    """Calcule le hachage de la partie `game` depuis le début."""
+    h = 0
+    for y, row in enumerate(game.background):
+        for x, tile in enumerate(row):
+            h ^= background_key(x, y, tile)
+    for entity in game.entities:
+        h ^= entity_key(entity, entity.x, entity.y)
+        if isinstance(entity, entities.PlayerEntity):
+            h ^= player_key(entity)
+    return h
+
+
+V = TypeVar("V")
+
+
+class TranspositionTable(Generic[V]):
+    """
+    Une table de taille bornée, indexée par le hachage des parties.
+
+    Chaque valeur est associée à une profondeur de recherche : une valeur n'est
+    remplacée que par une valeur au moins aussi profonde, et quand la table est
+    pleine, c'est l'entrée utilisée le moins récemment qui est supprimée.
+
+    La table peut être partagée entre des stratégies qui décident en parallèle :
+    chaque opération est protégée par un verrou.
+    """
+
+    def __init__(self, capacity: int = 1 << 16):
+        """Crée une table d'au plus `capacity` entrées."""
+        self.capacity = capacity
+        self.entries: OrderedDict[int, Tuple[int, V]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def get(self, h: int, depth: int = 0) -> Optional[V]:
+        """Renvoie la valeur de l'état `h` calculée à au moins `depth` de profondeur."""
+        with self.lock:
+            entry = self.entries.get(h)
+            if entry is None or entry[0] < depth:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(h)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, h: int, value: V, depth: int = 0):
+        """Enregistre la valeur de l'état `h`, calculée à `depth` de profondeur."""
+        with self.lock:
+            entry = self.entries.get(h)
+            if entry is not None and entry[0] > depth:
+                # On garde la recherche la plus profonde
+                self.entries.move_to_end(h)
+                return
+            self.entries[h] = (depth, value)
+            self.entries.move_to_end(h)
+            if len(self.entries) > self.capacity:
+                self.entries.popitem(last=False)
+
+    @property
+    def hit_rate(self) -> float:
+        """Proportion des recherches qui ont trouvé une valeur."""
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups > 0 else 0.0
+
+    def clear(self):
+        """Vide la table et remet les statistiques à zéro."""
+        with self.lock:
+            self.entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def __contains__(self, h: int) -> bool:
+        """Renvoie vrai si l'état `h` est dans la table."""
+        return h in self.entries
+
+    def __len__(self) -> int:
+        """Nombre d'entrées de la table."""
+        return len(self.entries)